@@ -0,0 +1,1725 @@
+#!/usr/bin/env python3
+"""
+CodeAnt AI Repository Scanner
+Runs the CodeAntSimulator analysis passes over a whole directory tree
+Usage: python codeant.py scan <directory>
+"""
+
+import os
+import sys
+import gzip
+import json
+import math
+import hashlib
+import time
+import random
+import argparse
+import multiprocessing
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+
+from codeant_simulator import CodeAntSimulator
+from codeant_taint import TaintEngine
+from codeant_baseline import Baseline, issue_fingerprint, relative_path
+from codeant_watch import create_watcher, next_batch, InotifyWatcher
+from codeant_config import Config
+from codeant_html import HtmlReportWriter, summary_sections
+from codeant_metrics import MetricsRegistry, MetricsServer, SnapshotWriter
+from codeant_artifacts import ArtifactCache, combine_stats
+
+DEFAULT_EXTENSIONS = (".py", ".js")
+SKIP_DIRS = {".git", "__pycache__", "node_modules", ".venv", "venv", ".tox", ".nox"}
+TIMINGS_FILE = ".codeant_timings.json"
+TAINT_CACHE_FILE = ".codeant_taint_cache.json"
+BASELINE_FILE = ".codeant-baseline"
+
+# Files above this many lines are split into chunks for the line-local passes
+CHUNK_LINES = 2000
+
+# Process-wide runtime metrics, recorded by the main process only
+METRICS = MetricsRegistry()
+FILES_ANALYZED = METRICS.counter("codeant_files_analyzed_total", "Source files analyzed")
+BYTES_PROCESSED = METRICS.counter("codeant_bytes_processed_total", "Bytes of source analyzed")
+LINES_PROCESSED = METRICS.counter("codeant_lines_processed_total", "Lines of source analyzed")
+PASS_LATENCY = METRICS.histogram("codeant_pass_duration_seconds",
+                                 "Time one analysis pass took on one task", ("pass",))
+CACHE_LOOKUPS = METRICS.counter("codeant_cache_lookups_total", "Cache lookups by cache and outcome",
+                                ("cache", "result"))
+QUEUE_DEPTH = METRICS.gauge("codeant_queue_depth", "Analysis tasks queued or in flight")
+ISSUES_EMITTED = METRICS.counter("codeant_issues_emitted_total", "Issues reported, by severity", ("severity",))
+
+
+def discover_files(root: str, extensions=DEFAULT_EXTENSIONS) -> List[str]:
+    """Return every source file under `root`, sorted for a deterministic order"""
+    found = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+        for name in filenames:
+            if name.endswith(tuple(extensions)):
+                found.append(os.path.join(dirpath, name))
+    return sorted(found)
+
+
+def read_source(path: str) -> str:
+    """Read a source file, tolerating undecodable bytes"""
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return f.read()
+
+
+# Pre-classification decisions and the passes each one runs
+ROUTE_FULL = "full"
+ROUTE_SECURITY = "security"
+ROUTE_SKIP = "skip"
+ROUTE_PASSES = {
+    ROUTE_FULL: CodeAntSimulator.PASSES,
+    ROUTE_SECURITY: ("security",),
+    ROUTE_SKIP: (),
+}
+
+CLASSIFY_HEAD_BYTES = 8192
+GENERATED_MARKERS = (
+    b"@generated", b"do not edit", b"generated by", b"auto-generated",
+    b"autogenerated", b"protocol buffer compiler", b"code generated",
+)
+VENDORED_DIRS = {"vendor", "vendored", "third_party", "thirdparty", "dist", "build"}
+LOCKFILE_NAMES = {"package-lock.json", "yarn.lock", "pnpm-lock.yaml", "poetry.lock",
+                  "Pipfile.lock", "Cargo.lock", "composer.lock"}
+
+
+def _byte_entropy(data: bytes) -> float:
+    """Shannon entropy of a byte string in bits per byte"""
+    if not data:
+        return 0.0
+    counts = [0] * 256
+    for byte in data:
+        counts[byte] += 1
+    total = len(data)
+    return -sum(c / total * math.log2(c / total) for c in counts if c)
+
+
+def classify_file(path: str, head: Optional[bytes] = None, root: str = "") -> Tuple[str, str]:
+    """Cheaply decide how much analysis a file deserves.
+
+    Only the first few KB are inspected. Returns a (route, reason) pair where
+    route is full analysis, security-only (secrets can still hide in bundles
+    and generated code) or skip.
+    """
+    name = os.path.basename(path)
+    if name in LOCKFILE_NAMES:
+        return ROUTE_SKIP, "lockfile"
+
+    if head is None:
+        with open(path, "rb") as f:
+            head = f.read(CLASSIFY_HEAD_BYTES)
+    if not head:
+        return ROUTE_SKIP, "empty file"
+    if b"\x00" in head:
+        return ROUTE_SKIP, "binary content (NUL bytes)"
+
+    entropy = _byte_entropy(head)
+    if entropy > 7.0:
+        return ROUTE_SKIP, f"compressed or encoded data (entropy {entropy:.2f} bits/byte)"
+
+    lowered = head[:1024].lower()
+    for marker in GENERATED_MARKERS:
+        if marker in lowered:
+            return ROUTE_SECURITY, f"generated file header ({marker.decode()!r})"
+
+    relative = os.path.relpath(path, root) if root else path
+    parts = set(os.path.normpath(relative).split(os.sep)[:-1])
+    if parts & VENDORED_DIRS:
+        return ROUTE_SECURITY, "vendored directory"
+
+    lines = head.split(b"\n")
+    # The last line may be cut off by the head limit, so ignore it when possible
+    complete = lines[:-1] or lines
+    average_length = sum(len(line) for line in complete) / len(complete)
+    if ".min." in name or average_length > 200:
+        return ROUTE_SECURITY, f"minified (average line length {average_length:.0f})"
+    if entropy > 6.0:
+        return ROUTE_SECURITY, f"high-entropy content ({entropy:.2f} bits/byte)"
+
+    return ROUTE_FULL, "source file"
+
+
+def classify_files(files: List[str], root: str = "") -> Dict[str, Dict[str, str]]:
+    """Classify every file, returning {path: {"route": ..., "reason": ...}}"""
+    decisions = {}
+    for path in files:
+        route, reason = classify_file(path, root=root)
+        decisions[path] = {"route": route, "reason": reason}
+    return decisions
+
+
+def select_passes(decisions: Dict[str, Dict[str, str]],
+                  config: Optional[Config] = None) -> Dict[str, Tuple[str, ...]]:
+    """Passes to run per file: the classifier's route, minus passes whose
+    rules the config switches off for the file's directory"""
+    passes_for = {}
+    for path, decision in decisions.items():
+        passes = ROUTE_PASSES[decision["route"]]
+        passes_for[path] = config.for_file(path).active_passes(passes) if config else passes
+    return passes_for
+
+
+class CostModel:
+    """Estimates how long a file will take to analyze.
+
+    Uses the last recorded timing for a path (scaled by its size change) and
+    falls back to a repository-wide seconds-per-byte rate for new files.
+    """
+
+    DEFAULT_RATE = 2e-6  # seconds per byte before anything has been measured
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.history: Dict[str, Tuple[int, float]] = {}
+        self.rate = self.DEFAULT_RATE
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                self.history = {k: tuple(v) for k, v in data.get("files", {}).items()}
+                self.rate = data.get("rate", self.DEFAULT_RATE)
+            except (OSError, ValueError):
+                pass
+
+    def estimate(self, filename: str, size: int) -> float:
+        """Estimated analysis time in seconds for a file of `size` bytes"""
+        if filename in self.history:
+            past_size, past_seconds = self.history[filename]
+            return past_seconds * (size / max(past_size, 1))
+        return size * self.rate
+
+    def record(self, filename: str, size: int, seconds: float):
+        """Remember a measured timing and fold it into the global rate"""
+        self.history[filename] = (size, seconds)
+        if size > 0:
+            # Exponential moving average keeps the rate stable across scans
+            self.rate = 0.8 * self.rate + 0.2 * (seconds / size)
+
+    def save(self):
+        if not self.path:
+            return
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"rate": self.rate, "files": self.history}, f)
+
+
+def split_chunks(code: str, chunk_lines: int = CHUNK_LINES) -> List[Tuple[int, int]]:
+    """Split a file into (start, end) line ranges of roughly `chunk_lines` lines.
+
+    Boundaries are moved forward to the next top-level `def`/`class` so that
+    chunks never start in the middle of a function.
+    """
+    lines = code.split('\n')
+    chunks = []
+    start = 0
+    while start < len(lines):
+        end = min(start + chunk_lines, len(lines))
+        while end < len(lines) and not lines[end].startswith(("def ", "class ", "function ")):
+            end += 1
+        chunks.append((start, end))
+        start = end
+    return chunks
+
+
+def plan_tasks(files: List[str], cost_model: CostModel, chunk_lines: int = CHUNK_LINES,
+               passes_for: Optional[Dict[str, Tuple[str, ...]]] = None,
+               cache: Optional[ArtifactCache] = None) -> List[Dict[str, Any]]:
+    """Turn a file list into analysis tasks with cost estimates.
+
+    Small files become a single task running every pass. Large files get one
+    task for the whole-file passes plus one task per chunk for the line-local
+    passes; rules of those passes that need the whole file
+    (`CodeAntSimulator.WHOLE_FILE_RULES`) run in the whole-file task instead.
+    `passes_for` restricts individual files to a subset of passes.
+    """
+    passes_for = passes_for or {}
+    tasks = []
+    for path in files:
+        passes = passes_for.get(path, CodeAntSimulator.PASSES)
+        size = os.path.getsize(path)
+        cost = cost_model.estimate(path, size) * len(passes) / len(CodeAntSimulator.PASSES)
+        if size <= chunk_lines * 40:
+            code = None
+        else:
+            code = cache.text(path) if cache is not None else read_source(path)
+        chunks = split_chunks(code, chunk_lines) if code is not None else []
+        if len(chunks) <= 1:
+            tasks.append({"path": path, "range": None, "passes": passes,
+                          "size": size, "cost": cost, "primary": True})
+            continue
+        # Roughly split the estimate between the whole-file and chunked passes
+        local_passes = tuple(p for p in passes if p in CodeAntSimulator.LINE_LOCAL_PASSES)
+        whole_file_passes = tuple(p for p in passes if p not in local_passes)
+        whole_file_rules = tuple(rule for rule, owner, _, _ in CodeAntSimulator.RULES
+                                 if owner in local_passes and rule in CodeAntSimulator.WHOLE_FILE_RULES)
+        share = len(local_passes) / len(passes)
+        total_lines = max(len(code.split('\n')), 1)
+        if whole_file_passes or whole_file_rules:
+            # The whole-file task runs the line-local passes only for their whole-file rules
+            exclude = tuple(rule for rule, owner, _, _ in CodeAntSimulator.RULES
+                            if owner in local_passes and rule not in whole_file_rules)
+            tasks.append({"path": path, "range": None, "passes": passes,
+                          "exclude": exclude, "size": size, "cost": cost * (1 - share)})
+        for start, end in chunks:
+            tasks.append({"path": path, "range": (start, end), "passes": local_passes,
+                          "exclude": whole_file_rules,
+                          "size": size, "cost": cost * share * (end - start) / total_lines})
+        # Exactly one task per file accounts for its bytes and lines in the metrics
+        tasks[-len(chunks) - bool(whole_file_passes or whole_file_rules)]["primary"] = True
+    # Largest first, so the long tasks never land at the tail of the scan
+    tasks.sort(key=lambda t: t["cost"], reverse=True)
+    return tasks
+
+
+# Baselines loaded in this process, keyed by path, so each worker reads a file once
+_baselines: Dict[str, Baseline] = {}
+
+
+def load_baseline(path: Optional[str]) -> Optional[Baseline]:
+    if not path:
+        return None
+    if path not in _baselines:
+        _baselines[path] = Baseline.load(path)
+    return _baselines[path]
+
+
+# Artifact cache of a pool worker process; lives as long as the scan's pool
+_worker_cache: Optional[ArtifactCache] = None
+
+
+def _run_batch(batch: List[Dict[str, Any]], cache: Optional[ArtifactCache] = None) -> List[Dict[str, Any]]:
+    """Worker entry point: analyze every task in a batch and time each one.
+
+    Chunks of one file share a single read of it through the artifact cache.
+    The primary task of each file also reports what repository-level steps
+    need (code lines, block fingerprints) so they never re-read the file.
+    """
+    global _worker_cache
+    if cache is None:
+        if _worker_cache is None:
+            _worker_cache = ArtifactCache()
+        cache = _worker_cache
+    codeant = CodeAntSimulator(load_baseline(batch[0].get("baseline")))
+    results = []
+    for task in batch:
+        started = time.perf_counter()
+        codeant.rules = task.get("rules")
+        codeant.path = task.get("relpath", "")
+        suppressed = codeant.suppressed
+        source = cache.get(task["path"])
+        if task["range"] is None:
+            issues = codeant.run_passes(source.text, task["passes"], source=source,
+                                        exclude=task.get("exclude", ()))
+        else:
+            start, end = task["range"]
+            issues = codeant.run_passes(source.line_range(start, end), task["passes"], line_offset=start,
+                                        exclude=task.get("exclude", ()))
+        result = {
+            "path": task["path"],
+            "range": task["range"],
+            "issues": issues,
+            "suppressed": codeant.suppressed - suppressed,
+            "seconds": time.perf_counter() - started,
+            "lines": 0,
+            "pass_seconds": codeant.pass_seconds,
+            "artifacts": (os.getpid(), dict(cache.stats)),
+        }
+        if task.get("primary"):
+            result["lines"] = len(source.lines)
+            result["code_lines"] = sum(1 for line in source.lines if line.strip())
+            result["blocks"] = block_fingerprints(source.text, source.lines) if task.get("blocks") else []
+        results.append(result)
+    return results
+
+
+def record_analysis(size: int, lines: int, pass_seconds: Dict[str, float],
+                    issues: List[Dict[str, Any]], new_file: bool = True):
+    """Update the runtime metrics for one analyzed file or task"""
+    if new_file:
+        FILES_ANALYZED.inc()
+        BYTES_PROCESSED.inc(size)
+        LINES_PROCESSED.inc(lines)
+    for name, seconds in pass_seconds.items():
+        PASS_LATENCY.observe(seconds, name)
+    for issue in issues:
+        ISSUES_EMITTED.inc(1, issue["severity"])
+
+
+def cache_hit_rates() -> Dict[str, Any]:
+    """Hit rate per cache, for metric snapshots"""
+    totals: Dict[str, List[float]] = {}
+    for (cache, result), count in CACHE_LOOKUPS.series():
+        totals.setdefault(cache, [0, 0])[result == "hit"] += count
+    return {"cache_hit_rate": {cache: round(hits / max(hits + misses, 1), 4)
+                               for cache, (misses, hits) in totals.items()}}
+
+
+def _next_batch(tasks: "deque[Dict[str, Any]]", remaining_cost: float,
+                workers: int) -> List[Dict[str, Any]]:
+    """Pop the next batch off the front of the (cost-sorted) task queue.
+
+    Batches target a shrinking share of the remaining work (guided
+    self-scheduling): expensive tasks go out alone, while the long tail of
+    small files is grouped to keep dispatch overhead low.
+    """
+    target = remaining_cost / (2 * workers)
+    batch = [tasks.popleft()]
+    cost = batch[0]["cost"]
+    while tasks and cost + tasks[0]["cost"] <= target:
+        cost += tasks[0]["cost"]
+        batch.append(tasks.popleft())
+    return batch
+
+
+class ScanScheduler:
+    """Cost-aware scheduler that fans file analysis out over worker processes.
+
+    Tasks are dispatched largest-first in adaptive batches. Only a couple of
+    batches per worker are in flight at once, so whichever worker finishes
+    first picks up the next batch and idle cores pull work from the queue.
+    """
+
+    def __init__(self, workers: Optional[int] = None, timings_path: Optional[str] = None,
+                 chunk_lines: int = CHUNK_LINES, baseline_path: Optional[str] = None,
+                 config: Optional[Config] = None, cache: Optional[ArtifactCache] = None,
+                 root: str = ""):
+        self.workers = workers or os.cpu_count() or 1
+        # Scan root; findings are fingerprinted with paths relative to it
+        self.root = root
+        self.cost_model = CostModel(timings_path)
+        self.chunk_lines = chunk_lines
+        self.baseline_path = baseline_path
+        self.config = config
+        # Used for planning and for in-process runs; pool workers have their own
+        self.cache = cache if cache is not None else ArtifactCache()
+        # Combined artifact statistics of the pool workers in the last run
+        self.worker_artifacts: Dict[str, int] = combine_stats()
+
+    def run(self, files: List[str], passes_for: Optional[Dict[str, Tuple[str, ...]]] = None,
+            blocks_for: Optional[set] = None, on_file=None) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """Analyze `files` and return (task results, scheduler statistics).
+
+        Files in `blocks_for` also get block fingerprints computed for
+        cross-file duplicate detection. With `on_file`, each file's task
+        results are passed to `on_file(path, results)` as soon as its last
+        task completes and are not kept, so the returned list is empty.
+        """
+        # A deque, so dispatching each batch off the front stays O(batch size)
+        tasks = deque(plan_tasks(files, self.cost_model, self.chunk_lines, passes_for, self.cache))
+        for task in tasks:
+            task["baseline"] = self.baseline_path
+            task["blocks"] = blocks_for is not None and task["path"] in blocks_for
+            task["relpath"] = relative_path(task["path"], self.root) if self.root else task["path"]
+            # Resolved once per directory by the config, shipped with each task
+            task["rules"] = self.config.for_file(task["path"]) if self.config else None
+        task_count = len(tasks)
+        chunk_count = sum(1 for t in tasks if t["range"] is not None)
+        remaining_cost = sum(t["cost"] for t in tasks)
+        results = []
+        batches = 0
+        started = time.perf_counter()
+
+        worker_artifacts = {}
+        # Tasks still outstanding and results so far of each file, for `on_file`
+        outstanding = Counter(task["path"] for task in tasks)
+        partial: Dict[str, List[Dict[str, Any]]] = {}
+        per_file: Dict[str, float] = {}
+        busy = longest = 0.0
+        suppressed = 0
+
+        def collect(batch_results):
+            nonlocal busy, longest, suppressed
+            for r in batch_results:
+                record_analysis(os.path.getsize(r["path"]), r["lines"], r["pass_seconds"], r["issues"],
+                                new_file="code_lines" in r)
+                pid, artifact_stats = r.pop("artifacts")
+                if pid != os.getpid():
+                    worker_artifacts[pid] = artifact_stats
+                busy += r["seconds"]
+                longest = max(longest, r["seconds"])
+                suppressed += r["suppressed"]
+                per_file[r["path"]] = per_file.get(r["path"], 0.0) + r["seconds"]
+                if on_file is None:
+                    results.append(r)
+                    continue
+                partial.setdefault(r["path"], []).append(r)
+                outstanding[r["path"]] -= 1
+                if not outstanding[r["path"]]:
+                    on_file(r["path"], partial.pop(r["path"]))
+
+        if self.workers == 1:
+            while tasks:
+                QUEUE_DEPTH.set(len(tasks))
+                batch = _next_batch(tasks, remaining_cost, 1)
+                remaining_cost -= sum(t["cost"] for t in batch)
+                collect(_run_batch(batch, self.cache))
+                batches += 1
+        else:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                pending = {}
+                while tasks or pending:
+                    while tasks and len(pending) < self.workers * 2:
+                        batch = _next_batch(tasks, remaining_cost, self.workers)
+                        remaining_cost -= sum(t["cost"] for t in batch)
+                        pending[pool.submit(_run_batch, batch)] = len(batch)
+                        batches += 1
+                    QUEUE_DEPTH.set(len(tasks) + sum(pending.values()))
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        del pending[future]
+                        collect(future.result())
+        QUEUE_DEPTH.set(0)
+        self.worker_artifacts = combine_stats(*worker_artifacts.values())
+
+        makespan = time.perf_counter() - started
+        # No schedule can beat perfect balance or the single longest task
+        ideal = max(busy / self.workers, longest)
+
+        for path, seconds in per_file.items():
+            self.cost_model.record(path, os.path.getsize(path), seconds)
+        self.cost_model.save()
+
+        stats = {
+            "workers": self.workers,
+            "tasks": task_count,
+            "chunks": chunk_count,
+            "batches": batches,
+            "makespan_seconds": round(makespan, 4),
+            "busy_seconds": round(busy, 4),
+            "ideal_makespan_seconds": round(ideal, 4),
+            "utilization": round(busy / max(makespan * self.workers, 1e-9), 3),
+            "makespan_efficiency": round(ideal / max(makespan, 1e-9), 3),
+            "suppressed": suppressed,
+        }
+        return results, stats
+
+
+def merge_results(results: List[Dict[str, Any]],
+                  extra_issues: Optional[Dict[str, List[Dict[str, Any]]]] = None
+                  ) -> Dict[str, List[Dict[str, Any]]]:
+    """Merge task results (including chunks) back into one issue list per file.
+
+    `extra_issues` holds repository-level findings per file. When a per-file
+    pass already reported the same issue on the same line, the repository-level
+    finding replaces it only if it is more severe, as cross-module taint is
+    when the untrusted value comes from another file.
+    """
+    rank = CodeAntSimulator.SEVERITY_RANK
+    by_file: Dict[str, List[Dict[str, Any]]] = {}
+    for r in results:
+        by_file.setdefault(r["path"], []).extend(r["issues"])
+    for path, issues in (extra_issues or {}).items():
+        existing = by_file.setdefault(path, [])
+        position = {(issue["line"], issue["issue"]): i for i, issue in enumerate(existing)}
+        for issue in issues:
+            key = (issue["line"], issue["issue"])
+            if key not in position:
+                position[key] = len(existing)
+                existing.append(issue)
+            elif rank[issue["severity"]] > rank[existing[position[key]]["severity"]]:
+                existing[position[key]] = issue
+    return {path: sorted(issues, key=lambda issue: issue["line"])
+            for path, issues in sorted(by_file.items())}
+
+
+def build_repository_report(file_reports: Iterable[Dict[str, Any]], root: str,
+                            keep_files: bool = True) -> Dict[str, Any]:
+    """Combine per-file reports into repository-wide totals.
+
+    `file_reports` may be a generator; without `keep_files` each report is
+    dropped once counted and the result has no "files" list.
+    """
+    severity_counts = {"CRITICAL": 0, "HIGH": 0, "MEDIUM": 0, "LOW": 0}
+    category_counts: Dict[str, int] = {}
+    code_lines = 0
+    files = 0
+    kept = []
+    for report in file_reports:
+        files += 1
+        if keep_files:
+            kept.append(report)
+        for severity, count in report["severity_breakdown"].items():
+            severity_counts[severity] += count
+        for category, count in report["category_breakdown"].items():
+            category_counts[category] = category_counts.get(category, 0) + count
+        code_lines += report["metrics"]["code_lines"]
+
+    total_issues = sum(severity_counts.values())
+    report = {
+        "root": root,
+        "files_analyzed": files,
+        "total_issues": total_issues,
+        "severity_breakdown": severity_counts,
+        "category_breakdown": category_counts,
+        "metrics": {
+            "code_lines": code_lines,
+            "issues_per_100_lines": round((total_issues / max(code_lines, 1)) * 100, 2),
+        },
+    }
+    if keep_files:
+        report["files"] = kept
+    return report
+
+
+def module_name(root: str, path: str) -> str:
+    """Dotted module name of a Python file relative to the scan root"""
+    relative = os.path.splitext(os.path.relpath(path, root))[0]
+    parts = relative.split(os.sep)
+    if parts[-1] == "__init__" and len(parts) > 1:
+        parts = parts[:-1]
+    return ".".join(parts)
+
+
+def run_taint_analysis(root: str, files: List[str], cache_path: Optional[str] = None,
+                       artifacts: Optional[ArtifactCache] = None
+                       ) -> Tuple[Dict[str, List[Dict[str, Any]]], Dict[str, int]]:
+    """Cross-module SQL injection tracking over every Python file in the scan"""
+    engine = TaintEngine(cache_path, root)
+    artifacts = artifacts if artifacts is not None else ArtifactCache()
+    for path in files:
+        if path.endswith(".py"):
+            source = artifacts.get(path)
+            if source.tree is not None:
+                engine.add_module(module_name(root, path), source.text, path, tree=source.tree)
+    issues = engine.analyze()
+    engine.save()
+    CACHE_LOOKUPS.inc(engine.stats["reused"], "taint_summaries", "hit")
+    CACHE_LOOKUPS.inc(engine.stats["analyzed"], "taint_summaries", "miss")
+    return issues, engine.stats
+
+
+PARTIAL_FORMAT = "codeant-partial"
+PARTIAL_VERSION = 2
+ISSUE_FIELDS = ("category", "severity", "line", "issue", "description", "suggestion", "code_snippet",
+                "fingerprint")
+
+# Cross-file duplication is detected on windows of this many significant lines
+BLOCK_LINES = 4
+BLOCK_MIN_CHARS = 80
+# Blocks shared by more files than this are boilerplate, not duplication
+MAX_DUPLICATE_FILES = 20
+
+
+def shard_files(root: str, files: List[str], index: int, count: int) -> List[str]:
+    """Deterministically pick the files belonging to shard `index` of `count`.
+
+    Files are assigned largest-first to the currently lightest shard (ties
+    broken by path), so every node computes the same balanced split from the
+    same checkout without talking to the others.
+    """
+    if not 0 <= index < count:
+        raise ValueError(f"shard index {index} is outside 0..{count - 1}")
+    sized = sorted(((os.path.getsize(path), os.path.relpath(path, root), path) for path in files),
+                   key=lambda item: (-item[0], item[1]))
+    loads = [0] * count
+    mine = []
+    for size, _, path in sized:
+        target = min(range(count), key=lambda shard: (loads[shard], shard))
+        loads[target] += max(size, 1)
+        if target == index:
+            mine.append(path)
+    return sorted(mine)
+
+
+def block_fingerprints(code: str, lines: Optional[List[str]] = None) -> List[List[Any]]:
+    """Hashes of every window of significant lines, with the window's first line.
+
+    Only the first occurrence of each hash is kept; these are all the merge
+    step needs to find code duplicated across files in different shards.
+    """
+    significant = [(i, line.strip()) for i, line in enumerate(lines or code.split('\n'), 1)
+                   if line.strip() and not line.strip().startswith(('#', '//'))]
+    seen = {}
+    for start in range(len(significant) - BLOCK_LINES + 1):
+        window = significant[start:start + BLOCK_LINES]
+        text = '\n'.join(line for _, line in window)
+        if len(text) < BLOCK_MIN_CHARS:
+            continue
+        digest = hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+        seen.setdefault(digest, window[0][0])
+    return [[digest, line] for digest, line in seen.items()]
+
+
+def scan_shard(root: str, index: int = 0, count: int = 1, workers: Optional[int] = None,
+               timings_path: Optional[str] = None, baseline_path: Optional[str] = None,
+               config: Optional[Config] = None, cache: Optional[ArtifactCache] = None) -> Dict[str, Any]:
+    """Analyze one shard of a directory tree and return its partial report.
+
+    Paths in the partial are relative to `root` so nodes may use different
+    checkout locations. Issues are stored as compact field lists; each file
+    is compacted as soon as its last task completes, so full task results
+    never pile up for the whole shard.
+    """
+    cache = cache if cache is not None else ArtifactCache()
+    before = dict(cache.stats)
+    files = shard_files(root, discover_files(root), index, count)
+    decisions = classify_files(files, root)
+    passes_for = select_passes(decisions, config)
+    to_analyze = [path for path in files if passes_for[path]]
+
+    blocks_for = {path for path in to_analyze if decisions[path]["route"] == ROUTE_FULL and (
+        config is None or config.for_file(path).enabled("cross_file_duplication"))}
+
+    partial_files = {}
+
+    def add_file(path, results):
+        primary = next(r for r in results if "code_lines" in r)
+        partial_files[os.path.relpath(path, root)] = {
+            "code_lines": primary["code_lines"],
+            "issues": [[issue[field] for field in ISSUE_FIELDS] for issue in merge_results(results)[path]],
+            "blocks": primary["blocks"],
+        }
+
+    scheduler = ScanScheduler(workers, timings_path, baseline_path=baseline_path, config=config, cache=cache,
+                              root=root)
+    _, stats = scheduler.run(to_analyze, passes_for, blocks_for, on_file=add_file)
+    partial_files = dict(sorted(partial_files.items()))
+
+    return {
+        "format": PARTIAL_FORMAT,
+        "version": PARTIAL_VERSION,
+        "shard": index,
+        "shards": count,
+        "root": os.path.abspath(root),
+        "files": partial_files,
+        "classification": {os.path.relpath(path, root): d for path, d in decisions.items()},
+        "scheduler": stats,
+        "artifacts": combine_stats(scheduler.worker_artifacts, cache.stats_since(before)),
+    }
+
+
+def partial_filename(index: int, count: int) -> str:
+    return f"shard-{index:04d}-of-{count:04d}.json.gz"
+
+
+def write_partial(partial: Dict[str, Any], directory: str) -> str:
+    """Write a partial report into `directory`; returns the file path"""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, partial_filename(partial["shard"], partial["shards"]))
+    # Write then rename so a merge never sees a half-written partial
+    temp_path = path + ".tmp"
+    with gzip.open(temp_path, "wt", encoding="utf-8") as f:
+        json.dump(partial, f, separators=(",", ":"))
+    os.replace(temp_path, path)
+    return path
+
+
+def read_partials(directory: str) -> List[Dict[str, Any]]:
+    """Load every partial in `directory` and check that they form a complete scan"""
+    partials = []
+    for name in sorted(os.listdir(directory)):
+        if name.startswith("shard-") and name.endswith(".json.gz"):
+            with gzip.open(os.path.join(directory, name), "rt", encoding="utf-8") as f:
+                partials.append(json.load(f))
+    if not partials:
+        raise ValueError(f"no partial reports found in {directory}")
+
+    for partial in partials:
+        if partial.get("format") != PARTIAL_FORMAT or partial.get("version") != PARTIAL_VERSION:
+            raise ValueError(f"unsupported partial report format in {directory}")
+    counts = {partial["shards"] for partial in partials}
+    if len(counts) != 1:
+        raise ValueError(f"partials come from different shard counts: {sorted(counts)}")
+    count = counts.pop()
+    present = sorted(partial["shard"] for partial in partials)
+    if present != list(range(count)):
+        missing = sorted(set(range(count)) - set(present))
+        raise ValueError(f"incomplete or duplicated shards (missing {missing}, found {present})")
+    return partials
+
+
+def find_cross_file_duplicates(blocks: Dict[str, List[List[Any]]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Report code blocks that appear in more than one file, once per file.
+
+    Each file's finding points at its first shared block, names the first
+    other file holding that block and counts every other file it shares a
+    block with. Blocks found in more than MAX_DUPLICATE_FILES files are
+    boilerplate (license headers, generated code) and are skipped, which
+    also keeps the work linear in the number of blocks.
+    """
+    locations: Dict[str, List[Tuple[str, int]]] = {}
+    for path, fingerprints in blocks.items():
+        for digest, line in fingerprints:
+            locations.setdefault(digest, []).append((path, line))
+
+    # Per file: (line, other file, other line, digest) of its first shared block
+    first_shared: Dict[str, Tuple[int, str, int, str]] = {}
+    sharing: Dict[str, set] = {}
+    for digest, places in locations.items():
+        if not 2 <= len(places) <= MAX_DUPLICATE_FILES:
+            continue
+        places = sorted(places)
+        for path, line in places:
+            other, other_line = next(place for place in places if place[0] != path)
+            if path not in first_shared or (line, other) < first_shared[path][:2]:
+                first_shared[path] = (line, other, other_line, digest)
+            sharing.setdefault(path, set()).update(place for place, _ in places if place != path)
+
+    issues: Dict[str, List[Dict[str, Any]]] = {}
+    for path, (line, other, other_line, digest) in sorted(first_shared.items()):
+        fingerprint = issue_fingerprint("Cross-file Duplication", digest, "", path.replace(os.sep, "/"))
+        description = f"Code block also appears in {other} (line {other_line})"
+        if len(sharing[path]) > 1:
+            description += f"; shares code with {len(sharing[path])} other files"
+        issues[path] = [{
+            "category": "Maintainability",
+            "severity": "MEDIUM",
+            "line": line,
+            "issue": "Cross-file Duplication",
+            "description": description,
+            "suggestion": "Move the shared code into a common module",
+            "code_snippet": "",
+            "fingerprint": f"{fingerprint:016x}"
+        }]
+    return issues
+
+
+def combine_scheduler_stats(shard_stats: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Scheduler statistics for shards that ran side by side on separate nodes"""
+    if len(shard_stats) == 1:
+        return shard_stats[0]
+    busy = sum(stats["busy_seconds"] for stats in shard_stats)
+    workers = sum(stats["workers"] for stats in shard_stats)
+    # The merged scan is only done when the slowest shard is, so idle time on
+    # nodes that finished early counts against utilization
+    makespan = max(stats["makespan_seconds"] for stats in shard_stats)
+    ideal = max(busy / workers, max(stats["ideal_makespan_seconds"] for stats in shard_stats))
+    return {
+        "shards": shard_stats,
+        "workers": workers,
+        "tasks": sum(stats["tasks"] for stats in shard_stats),
+        "chunks": sum(stats["chunks"] for stats in shard_stats),
+        "batches": sum(stats["batches"] for stats in shard_stats),
+        "makespan_seconds": makespan,
+        "busy_seconds": round(busy, 4),
+        "ideal_makespan_seconds": ideal,
+        "utilization": round(busy / max(makespan * workers, 1e-9), 3),
+        "makespan_efficiency": round(ideal / max(makespan, 1e-9), 3),
+        "suppressed": sum(stats.get("suppressed", 0) for stats in shard_stats),
+    }
+
+
+def apply_config(issues: Dict[str, List[Dict[str, Any]]], rule: str,
+                 config: Optional[Config]) -> Dict[str, List[Dict[str, Any]]]:
+    """Drop repository-level findings of `rule` where the config switches it
+    off and apply its severity override elsewhere"""
+    if config is None:
+        return issues
+    kept = {}
+    for path, found in issues.items():
+        rules = config.for_file(path)
+        if rules.enabled(rule):
+            severity = rules.severity.get(rule)
+            kept[path] = [dict(issue, severity=severity) for issue in found] if severity else found
+    return kept
+
+
+def merge_partials(partials: List[Dict[str, Any]], root: Optional[str] = None,
+                   taint_cache_path: Optional[str] = None,
+                   baseline_path: Optional[str] = None,
+                   config: Optional[Config] = None,
+                   cache: Optional[ArtifactCache] = None,
+                   on_file=None, keep_files: bool = True) -> Dict[str, Any]:
+    """Combine shard partials into one repository report.
+
+    Cross-file results are computed here: duplicated blocks from the
+    fingerprints in the partials and, when the source tree is available
+    under `root`, cross-module SQL injection taint tracking. Findings known
+    to the baseline are dropped from these too. Taint tracking takes source
+    text and trees from `cache`, so files the shard already read in this
+    process are neither re-read nor re-parsed.
+
+    Per-file reports are built one at a time from the compact partial rows
+    and passed to `on_file` as they are produced; unless `keep_files` is
+    set they are not kept, so expanded issue dicts never exist for every
+    file at once. The first report can only be built once the cross-file
+    results are known, that is after every file has been analyzed.
+    """
+    cache = cache if cache is not None else ArtifactCache()
+    before = dict(cache.stats)
+    root = root or partials[0]["root"]
+    rows: Dict[str, List[List[Any]]] = {}
+    code_lines: Dict[str, int] = {}
+    blocks: Dict[str, List[List[Any]]] = {}
+    decisions: Dict[str, Dict[str, str]] = {}
+    for partial in partials:
+        for relative, data in partial["files"].items():
+            path = os.path.join(root, relative)
+            rows[path] = data["issues"]
+            code_lines[path] = data["code_lines"]
+            blocks[relative] = data["blocks"]
+        for relative, decision in partial["classification"].items():
+            decisions[os.path.join(root, relative)] = decision
+
+    extra = apply_config({os.path.join(root, relative): found
+                          for relative, found in find_cross_file_duplicates(blocks).items()},
+                         "cross_file_duplication", config)
+    taint_stats = None
+    if os.path.isdir(root) and (config is None or config.enabled_anywhere("sql_taint")):
+        taint_issues, taint_stats = run_taint_analysis(root, sorted(rows), taint_cache_path, cache)
+        for path, found in apply_config(taint_issues, "sql_taint", config).items():
+            extra.setdefault(path, []).extend(found)
+
+    baseline = load_baseline(baseline_path)
+    suppressed = 0
+    if baseline is not None:
+        for path, found in extra.items():
+            kept = [issue for issue in found if int(issue["fingerprint"], 16) not in baseline]
+            suppressed += len(found) - len(kept)
+            extra[path] = kept
+
+    def file_reports():
+        codeant = CodeAntSimulator()
+        for path in sorted(set(rows) | set(extra)):
+            found = [dict(zip(ISSUE_FIELDS, values)) for values in rows.get(path, [])]
+            extra_ids = {id(issue) for issue in extra.get(path, [])}
+            codeant.issues_found = merge_results([{"path": path, "issues": found}],
+                                                 {path: extra.get(path, [])})[path]
+            # Only repository-level findings that survived de-duplication count as emitted
+            record_analysis(0, 0, {}, [issue for issue in codeant.issues_found if id(issue) in extra_ids],
+                            new_file=False)
+            file_report = codeant._generate_report(path, code_lines=code_lines.get(path, 0))
+            if on_file is not None:
+                on_file(file_report)
+            yield file_report
+
+    report = build_repository_report(file_reports(), root, keep_files)
+    report["scheduler"] = combine_scheduler_stats(
+        [partial["scheduler"] for partial in sorted(partials, key=lambda p: p["shard"])])
+    report["artifacts"] = combine_stats(cache.stats_since(before),
+                                        *(partial.get("artifacts", {}) for partial in partials))
+    CACHE_LOOKUPS.inc(report["artifacts"]["reads_avoided"], "source_artifacts", "hit")
+    CACHE_LOOKUPS.inc(report["artifacts"]["reads"], "source_artifacts", "miss")
+    if taint_stats is not None:
+        report["taint"] = taint_stats
+    if baseline is not None:
+        report["baseline"] = {
+            "path": baseline_path,
+            "known_findings": len(baseline),
+            "suppressed": suppressed + report["scheduler"]["suppressed"],
+        }
+    report["classification"] = {
+        "routes": {route: sum(1 for d in decisions.values() if d["route"] == route)
+                   for route in ROUTE_PASSES},
+        "files": dict(sorted(decisions.items())),
+    }
+    return report
+
+
+def scan(root: str, workers: Optional[int] = None, timings_path: Optional[str] = None,
+         taint_cache_path: Optional[str] = None, baseline_path: Optional[str] = None,
+         config: Optional[Config] = None, on_file=None, keep_files: bool = True) -> Dict[str, Any]:
+    """Scan a directory tree and return the repository report.
+
+    `on_file` and `keep_files` work as for `merge_partials`: file reports
+    reach `on_file` after the whole tree has been analyzed, since
+    cross-file findings need every file.
+    """
+    cache = ArtifactCache()
+    partial = scan_shard(root, 0, 1, workers, timings_path, baseline_path, config, cache)
+    return merge_partials([partial], root, taint_cache_path, baseline_path, config, cache,
+                          on_file, keep_files)
+
+
+def create_baseline(root: str, output: str, workers: Optional[int] = None,
+                    timings_path: Optional[str] = None,
+                    taint_cache_path: Optional[str] = None,
+                    config: Optional[Config] = None) -> Baseline:
+    """Record the fingerprint of every current finding as the baseline"""
+    report = scan(root, workers, timings_path, taint_cache_path, config=config)
+    baseline = Baseline(int(issue["fingerprint"], 16)
+                        for file_report in report["files"] for issue in file_report["issues"])
+    baseline.save(output)
+    return baseline
+
+
+# Set in gate workers by the pool initializer; shared stop flag for fail-fast
+_gate_stop = None
+
+
+def _init_gate_worker(stop_event):
+    global _gate_stop
+    _gate_stop = stop_event
+
+
+def _gate_file(path: str, threshold: str, passes: Tuple[str, ...],
+               baseline_path: Optional[str] = None, rules=None, relpath: str = "") -> Optional[Dict[str, Any]]:
+    """Worker entry point: first qualifying issue in a file, if any"""
+    if _gate_stop is not None and _gate_stop.is_set():
+        return None
+    codeant = CodeAntSimulator(load_baseline(baseline_path), rules)
+    codeant.path = relpath
+    issue = codeant.gate_check(read_source(path), threshold, passes)
+    if issue is not None and _gate_stop is not None:
+        _gate_stop.set()
+    return issue
+
+
+def expand_paths(paths: List[str]) -> List[str]:
+    """Files given directly are kept as-is; directories are searched for sources"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(discover_files(path))
+        elif os.path.isfile(path):
+            files.append(path)
+    return files
+
+
+def common_root(paths: List[str]) -> str:
+    """Deepest directory containing every path"""
+    directories = [os.path.abspath(path if os.path.isdir(path) else os.path.dirname(path) or ".")
+                   for path in paths]
+    return os.path.commonpath(directories) if directories else os.path.abspath(".")
+
+
+def gate(paths: List[str], threshold: str = "CRITICAL", workers: Optional[int] = 1,
+         stop_all: bool = False, baseline_path: Optional[str] = None,
+         config: Optional[Config] = None, root: str = ".") -> List[Tuple[str, Dict[str, Any]]]:
+    """Severity-gated fail-fast check for blocking hooks.
+
+    Each file stops at its first issue at or above `threshold`. With
+    `stop_all`, the first qualifying issue anywhere also stops every other
+    file, including those queued on other pool workers. Findings in the
+    baseline never trigger the gate. Returns the triggering (path, issue)
+    pairs; an empty list means the gate passed.
+
+    Files are classified relative to `root` (the checkout a hook runs in),
+    or to the common base of `paths` when some lie outside it, so that
+    directories above the checkout never count as vendored.
+    """
+    files = expand_paths(paths)
+    base = os.path.abspath(root)
+    if any(os.path.relpath(os.path.abspath(path), base).startswith(os.pardir) for path in files):
+        base = common_root(paths)
+    passes_for = select_passes(classify_files(files, base), config)
+    files = [path for path in files if passes_for[path]]
+    rules_for = {path: config.for_file(path) if config else None for path in files}
+    workers = workers or os.cpu_count() or 1
+    triggered = []
+
+    if workers == 1 or len(files) <= 1:
+        for path in files:
+            issue = _gate_file(path, threshold, passes_for[path], baseline_path, rules_for[path],
+                               relative_path(path, base))
+            if issue is not None:
+                triggered.append((path, issue))
+                if stop_all:
+                    break
+        return triggered
+
+    stop_event = multiprocessing.Manager().Event() if stop_all else None
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_gate_worker,
+                             initargs=(stop_event,)) as pool:
+        futures = {pool.submit(_gate_file, path, threshold, passes_for[path], baseline_path,
+                               rules_for[path], relative_path(path, base)): path for path in files}
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                issue = future.result()
+                if issue is not None:
+                    triggered.append((futures[future], issue))
+            if stop_all and triggered:
+                for future in pending:
+                    future.cancel()
+                break
+    return sorted(triggered, key=lambda item: (item[0], item[1]["line"]))
+
+
+def stratify(root: str, files: List[str]) -> Dict[Tuple[str, str], List[str]]:
+    """Group files by top-level directory and extension"""
+    strata: Dict[Tuple[str, str], List[str]] = {}
+    for path in files:
+        parts = os.path.relpath(path, root).split(os.sep)
+        top = parts[0] if len(parts) > 1 else "."
+        strata.setdefault((top, os.path.splitext(path)[1]), []).append(path)
+    return strata
+
+
+def _stratum_variances(values: List[List[float]]) -> List[Tuple[float, float]]:
+    """Sample variance of the values observed in each stratum, with its degrees of freedom.
+
+    A stratum with a single observation has no variance of its own and gets
+    the variance pooled over the other strata (and their degrees of freedom);
+    with nothing to pool from it is infinite, so the interval is reported
+    unbounded instead of zero-width.
+    """
+    pooled_squares = pooled_df = 0.0
+    own: List[Optional[Tuple[float, float]]] = []
+    for stratum in values:
+        n = len(stratum)
+        if n < 2:
+            own.append(None)
+            continue
+        mean = sum(stratum) / n
+        squares = sum((v - mean) ** 2 for v in stratum)
+        pooled_squares += squares
+        pooled_df += n - 1
+        own.append((squares / (n - 1), n - 1))
+    pooled = (pooled_squares / pooled_df, pooled_df) if pooled_df else (math.inf, 0.0)
+    return [pooled if s2 is None else s2 for s2 in own]
+
+
+# Two-sided 95% Student-t quantiles for 1..30 degrees of freedom
+T_975 = (12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+         2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+         2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042)
+Z_975 = 1.959964
+
+
+def t_quantile(df: float) -> float:
+    """Two-sided 95% Student-t quantile, rounding fractional `df` down.
+
+    Beyond the table the Cornish-Fisher expansion around the normal quantile
+    is accurate to the third decimal.
+    """
+    if df < 1:
+        return math.inf
+    if df <= len(T_975):
+        return T_975[int(df) - 1]
+    if math.isinf(df):
+        return Z_975
+    z = Z_975
+    return (z + (z ** 3 + z) / (4 * df) + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * df ** 2) +
+            (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * df ** 3))
+
+
+def _combined_variance(terms: List[Tuple[float, float]]) -> Tuple[float, float]:
+    """Sum of variance terms and its Welch-Satterthwaite degrees of freedom.
+
+    Each term is (contribution, degrees of freedom of its variance estimate).
+    """
+    variance = sum(term for term, _ in terms)
+    if math.isinf(variance):
+        return variance, 0.0
+    spread = sum(term ** 2 / df for term, df in terms if term)
+    return variance, (variance ** 2 / spread if spread else math.inf)
+
+
+def _interval(estimate: float, variance: float, df: float, low: float = 0.0,
+              high: Optional[float] = None) -> Dict[str, Any]:
+    """Estimate with a Student-t interval for `df` degrees of freedom; an
+    infinite variance gives [low, high], where a missing `high` means
+    unbounded (null in JSON)"""
+    if math.isinf(variance):
+        return {"estimate": round(estimate, 3), "ci95": [low, high]}
+    margin = t_quantile(df) * math.sqrt(max(variance, 0.0)) if variance > 0 else 0.0
+    upper = estimate + margin if high is None else min(high, estimate + margin)
+    return {"estimate": round(estimate, 3),
+            "ci95": [round(max(low, estimate - margin), 3), round(upper, 3)]}
+
+
+class SampledScan:
+    """Stratified random sample of a repository that can grow toward a full scan.
+
+    Each stratum is shuffled once with a fixed seed and files are always
+    taken from the front of that order, so a larger sample contains every
+    smaller one and results are reproducible for the same seed.
+    """
+
+    def __init__(self, root: str, files: List[str], seed: int = 0):
+        self.root = root
+        self.seed = seed
+        rng = random.Random(seed)
+        self.order = {}
+        self.stratum_of: Dict[str, Tuple[str, str]] = {}
+        for key, paths in sorted(stratify(root, files).items()):
+            paths = sorted(paths)
+            rng.shuffle(paths)
+            self.order[key] = paths
+            self.stratum_of.update(dict.fromkeys(paths, key))
+        self.observations: Dict[Tuple[str, str], List[Dict[str, Any]]] = {key: [] for key in self.order}
+        self.total_files = len(files)
+
+    @property
+    def sampled(self) -> int:
+        return sum(len(obs) for obs in self.observations.values())
+
+    def next_files(self, fraction: float) -> List[str]:
+        """Files to add so every stratum reaches `fraction` (at least one file each)"""
+        batch = []
+        for key, paths in self.order.items():
+            target = min(len(paths), max(1, math.ceil(len(paths) * fraction)))
+            batch.extend(paths[len(self.observations[key]):target])
+        return batch
+
+    def add(self, path: str, report: Dict[str, Any]):
+        self.observations[self.stratum_of[path]].append({
+            "lines": report["metrics"]["code_lines"],
+            "severity": report["severity_breakdown"],
+            "category": report["category_breakdown"],
+            "total": report["total_issues"],
+            "security_score": report["metrics"]["security_score"],
+            "quality_score": report["metrics"]["quality_score"],
+        })
+
+    def _ratio(self, value) -> Dict[str, Any]:
+        """Combined ratio estimate of issues per 1000 lines with a linearized variance"""
+        totals_y = totals_x = 0.0
+        for key, obs in self.observations.items():
+            if obs:
+                size = len(self.order[key])
+                totals_y += size * sum(value(o) for o in obs) / len(obs)
+                totals_x += size * sum(o["lines"] for o in obs) / len(obs)
+        if totals_x == 0:
+            return _interval(0.0, 0.0, math.inf)
+        ratio = totals_y / totals_x
+        keys = [key for key, obs in self.observations.items() if obs]
+        residuals = [[value(o) - ratio * o["lines"] for o in self.observations[key]] for key in keys]
+        terms = []
+        for key, (s2, df) in zip(keys, _stratum_variances(residuals)):
+            size, n = len(self.order[key]), len(self.observations[key])
+            if n < size:
+                terms.append((size ** 2 * (1 - n / size) * s2 / n / totals_x ** 2, df))
+        variance, df = _combined_variance(terms)
+        return _interval(ratio * 1000, variance * 1000 ** 2, df)
+
+    def _mean(self, field: str) -> Dict[str, Any]:
+        """Stratified estimate of the mean per-file score"""
+        estimate = 0.0
+        terms = []
+        keys = [key for key, obs in self.observations.items() if obs]
+        values = [[o[field] for o in self.observations[key]] for key in keys]
+        for key, stratum, (s2, df) in zip(keys, values, _stratum_variances(values)):
+            size, n = len(self.order[key]), len(stratum)
+            weight = size / self.total_files
+            estimate += weight * sum(stratum) / n
+            if n < size:
+                terms.append((weight ** 2 * (1 - n / size) * s2 / n, df))
+        # Weights of strata without observations are missing; renormalize
+        covered = sum(len(self.order[k]) for k, obs in self.observations.items() if obs) / max(self.total_files, 1)
+        if not covered:
+            return _interval(0.0, 0.0, math.inf)
+        variance, df = _combined_variance(terms)
+        return _interval(estimate / covered, variance / covered ** 2, df, 0.0, 100.0)
+
+    def estimates(self) -> Dict[str, Any]:
+        """Point estimates with 95% intervals; each interval uses the Student-t
+        quantile for the Welch-Satterthwaite degrees of freedom of its strata,
+        so strata with only a few sampled files widen it accordingly"""
+        severities = ("CRITICAL", "HIGH", "MEDIUM", "LOW")
+        categories = sorted({c for obs in self.observations.values() for o in obs for c in o["category"]})
+        estimated_lines = sum(len(self.order[key]) * sum(o["lines"] for o in obs) / len(obs)
+                              for key, obs in self.observations.items() if obs)
+        return {
+            "seed": self.seed,
+            "files_total": self.total_files,
+            "files_sampled": self.sampled,
+            "coverage": round(self.sampled / max(self.total_files, 1), 4),
+            "strata": len(self.order),
+            "estimated_code_lines": round(estimated_lines),
+            "density_per_1000_lines": {
+                "total": self._ratio(lambda o: o["total"]),
+                "severity": {s: self._ratio(lambda o, s=s: o["severity"].get(s, 0)) for s in severities},
+                "category": {c: self._ratio(lambda o, c=c: o["category"].get(c, 0)) for c in categories},
+            },
+            "security_score": self._mean("security_score"),
+            "quality_score": self._mean("quality_score"),
+        }
+
+
+def print_estimates(estimates: Dict[str, Any]):
+    """Print sampled health estimates with their 95% confidence intervals"""
+    def fmt(value: Dict[str, Any]) -> str:
+        low, high = value["ci95"]
+        return f"{value['estimate']} (95% CI {low} - {'unbounded' if high is None else high})"
+
+    print(f"\n🎲 SAMPLED ESTIMATE: {estimates['files_sampled']}/{estimates['files_total']} files "
+          f"({estimates['coverage']:.1%}, {estimates['strata']} strata, seed {estimates['seed']})")
+    print(f"   Security Score: {fmt(estimates['security_score'])}")
+    print(f"   Quality Score: {fmt(estimates['quality_score'])}")
+    density = estimates["density_per_1000_lines"]
+    print(f"   Issues per 1000 lines: {fmt(density['total'])}")
+    for severity, value in density["severity"].items():
+        print(f"      {severity}: {fmt(value)}")
+    for category, value in density["category"].items():
+        print(f"      {category}: {fmt(value)}")
+
+
+def sample_scan(root: str, seed: int = 0, fraction: float = 0.05, time_budget: float = 10.0,
+                workers: Optional[int] = None, timings_path: Optional[str] = None,
+                on_round=None, config: Optional[Config] = None) -> Dict[str, Any]:
+    """Estimate repository health from a stratified random sample of files.
+
+    Starts with `fraction` of every stratum and keeps doubling the sample
+    while the time budget allows, calling `on_round` with the estimates
+    after every round. Given enough time it ends as a full scan, at which
+    point the confidence intervals collapse to the exact values.
+    """
+    started = time.perf_counter()
+    sampler = SampledScan(root, discover_files(root), seed)
+    scheduler = ScanScheduler(workers, timings_path, config=config, root=root)
+    codeant = CodeAntSimulator()
+    estimates = sampler.estimates()
+    while True:
+        files = sampler.next_files(fraction)
+        if not files:
+            break
+        round_started = time.perf_counter()
+        passes_for = select_passes(classify_files(files, root), config)
+        results, _ = scheduler.run([path for path in files if passes_for[path]], passes_for)
+        issues = merge_results(results)
+        code_lines = {r["path"]: r["code_lines"] for r in results if "code_lines" in r}
+        for path in files:
+            codeant.issues_found = issues.get(path, [])
+            sampler.add(path, codeant._generate_report(path, code_lines=code_lines.get(path, 0)))
+        estimates = sampler.estimates()
+        if on_round:
+            on_round(estimates)
+
+        remaining = time_budget - (time.perf_counter() - started)
+        # The next round analyzes about as many files again as this one did
+        if remaining < 2 * (time.perf_counter() - round_started):
+            break
+        fraction *= 2
+    return estimates
+
+
+class WatchSession:
+    """In-memory scan state that is updated one changed file at a time.
+
+    Per-file results of unchanged files are kept as they are. Of the
+    repository-level aggregates, cross-file duplication is recomputed only
+    for files sharing a code block with a changed file, and taint tracking
+    reuses memoized summaries so only changed functions and their callers
+    are re-analyzed.
+    """
+
+    def __init__(self, root: str, baseline_path: Optional[str] = None,
+                 config: Optional[Config] = None):
+        self.root = root
+        self.baseline = load_baseline(baseline_path)
+        self.config = config
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.block_index: Dict[str, set] = {}
+        self.cross_file: Dict[str, List[Dict[str, Any]]] = {}
+        self.taint = TaintEngine(root=root)
+        self.taint_issues: Dict[str, List[Dict[str, Any]]] = {}
+        # Shared by per-file analysis and taint tracking; changed files are re-read
+        self.cache = ArtifactCache()
+
+    def _neighbours(self, blocks: List[List[Any]]) -> set:
+        """Files containing any of these code blocks"""
+        found = set()
+        for digest, _ in blocks:
+            found |= self.block_index.get(digest, set())
+        return found
+
+    def update(self, paths) -> Dict[str, int]:
+        """Re-analyze `paths` (changed, created or deleted) and refresh aggregates"""
+        affected = set()
+        python_changed = False
+        paths = sorted(paths)
+        for position, path in enumerate(paths):
+            QUEUE_DEPTH.set(len(paths) - position)
+            relative = os.path.relpath(path, self.root)
+            old = self.files.pop(path, None)
+            if old is not None:
+                affected |= self._neighbours(old["blocks"])
+                for digest, _ in old["blocks"]:
+                    self.block_index[digest].discard(relative)
+            if path.endswith(".py"):
+                self.taint.remove_module(module_name(self.root, path))
+                python_changed = True
+            affected.add(relative)
+            if not os.path.isfile(path):
+                continue
+
+            route, _ = classify_file(path, root=self.root)
+            rules = self.config.for_file(path) if self.config else None
+            passes = rules.active_passes(ROUTE_PASSES[route]) if rules else ROUTE_PASSES[route]
+            if not passes:
+                continue
+            source = self.cache.get(path)
+            codeant = CodeAntSimulator(self.baseline, rules)
+            codeant.path = relative_path(path, self.root)
+            issues = codeant.run_passes(source.text, passes, source=source)
+            record_analysis(os.path.getsize(path), len(source.lines), codeant.pass_seconds, issues)
+            wants_blocks = route == ROUTE_FULL and (rules is None or rules.enabled("cross_file_duplication"))
+            blocks = block_fingerprints(source.text, source.lines) if wants_blocks else []
+            code_lines = sum(1 for line in source.lines if line.strip())
+            self.files[path] = {"issues": issues, "code_lines": code_lines, "blocks": blocks}
+            for digest, _ in blocks:
+                self.block_index.setdefault(digest, set()).add(relative)
+            affected |= self._neighbours(blocks)
+            if path.endswith(".py") and source.tree is not None:
+                self.taint.add_module(module_name(self.root, path), source.text, path, tree=source.tree)
+
+        # Pairs involving an affected file need both sides' blocks
+        involved = set(affected)
+        for relative in affected:
+            data = self.files.get(os.path.join(self.root, relative))
+            if data is not None:
+                involved |= self._neighbours(data["blocks"])
+        blocks = {relative: self.files[os.path.join(self.root, relative)]["blocks"]
+                  for relative in involved if os.path.join(self.root, relative) in self.files}
+        duplicates = find_cross_file_duplicates(blocks)
+        for relative in affected:
+            self.cross_file.pop(relative, None)
+            if relative in duplicates:
+                found = apply_config({os.path.join(self.root, relative): duplicates[relative]},
+                                     "cross_file_duplication", self.config)
+                self.cross_file[relative] = self._known_dropped(sum(found.values(), []))
+
+        QUEUE_DEPTH.set(0)
+        if python_changed:
+            self.taint_issues = {path: self._known_dropped(found) for path, found in
+                                 apply_config(self.taint.analyze(), "sql_taint", self.config).items()}
+            CACHE_LOOKUPS.inc(self.taint.stats["reused"], "taint_summaries", "hit")
+            CACHE_LOOKUPS.inc(self.taint.stats["analyzed"], "taint_summaries", "miss")
+        return {"files": len(paths), "aggregates_refreshed": len(affected),
+                "taint_functions_analyzed": self.taint.stats["analyzed"] if python_changed else 0}
+
+    def _known_dropped(self, issues: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if self.baseline is None:
+            return issues
+        return [issue for issue in issues if int(issue["fingerprint"], 16) not in self.baseline]
+
+    def report(self, changed=()) -> Dict[str, Any]:
+        """Repository report in the per-file report shape, changed files' issues first"""
+        extra = {os.path.join(self.root, relative): list(found) for relative, found in self.cross_file.items()}
+        for path, found in self.taint_issues.items():
+            extra.setdefault(path, []).extend(found)
+        merged = merge_results([{"path": path, "issues": data["issues"]} for path, data in self.files.items()],
+                               {path: found for path, found in extra.items() if path in self.files})
+        changed = set(changed)
+        ordered = [issue for path, found in merged.items() if path in changed for issue in found]
+        ordered += [issue for path, found in merged.items() if path not in changed for issue in found]
+
+        codeant = CodeAntSimulator()
+        codeant.issues_found = ordered
+        code_lines = sum(data["code_lines"] for data in self.files.values())
+        return codeant._generate_report(self.root, code_lines=code_lines)
+
+
+def watch(root: str, debounce: float = 0.3, polling: bool = False,
+          baseline_path: Optional[str] = None, max_batches: Optional[int] = None,
+          config: Optional[Config] = None):
+    """Watch a directory and print a live summary after every batch of changes"""
+    session = WatchSession(root, baseline_path, config)
+    session.update(discover_files(root))
+    printer = CodeAntSimulator()
+    printer.print_report(session.report())
+
+    watcher = create_watcher(root, DEFAULT_EXTENSIONS, SKIP_DIRS, polling)
+    mode = "inotify" if isinstance(watcher, InotifyWatcher) else "polling"
+    print(f"\n👀 Watching {root} ({mode}), press Ctrl+C to stop")
+    batches = 0
+    try:
+        while max_batches is None or batches < max_batches:
+            try:
+                changed = next_batch(watcher, debounce)
+            except OverflowError:
+                # Too many events to trust: fall back to re-checking everything
+                changed = set(discover_files(root)) | set(session.files)
+            changed = {path for path in changed
+                       if not SKIP_DIRS & set(os.path.relpath(path, root).split(os.sep))}
+            if not changed:
+                continue
+            started = time.perf_counter()
+            stats = session.update(changed)
+            elapsed = (time.perf_counter() - started) * 1000
+            print(f"\n🔄 Re-analyzed {stats['files']} changed file(s) in {elapsed:.0f} ms "
+                  f"({stats['aggregates_refreshed']} files' aggregates refreshed, "
+                  f"{stats['taint_functions_analyzed']} functions re-traced)")
+            for path in sorted(changed):
+                print(f"   • {os.path.relpath(path, root)}")
+            printer.print_report(session.report(changed))
+            batches += 1
+    except KeyboardInterrupt:
+        print("\n👋 Stopped watching")
+    finally:
+        watcher.close()
+
+
+def start_metrics(port: Optional[int] = None, snapshot_path: Optional[str] = None,
+                  interval: float = 10.0) -> List[Any]:
+    """Expose METRICS on a local port and/or in a periodic snapshot file.
+
+    Returns the started exporters; call `close()` on each when done.
+    """
+    exporters = []
+    if port is not None:
+        server = MetricsServer(METRICS, port)
+        print(f"📈 Metrics at http://127.0.0.1:{server.port}/metrics")
+        exporters.append(server)
+    if snapshot_path:
+        exporters.append(SnapshotWriter(METRICS, snapshot_path, interval, extra=cache_hit_rates))
+    return exporters
+
+
+def print_summary(report: Dict[str, Any]):
+    """Print a short repository summary"""
+    print("\n" + "="*60)
+    print("📊 CODEANT AI REPOSITORY SCAN")
+    print("="*60)
+    print(f"Root: {report['root']}")
+    print(f"Files Analyzed: {report['files_analyzed']}")
+    print(f"Total Issues Found: {report['total_issues']}")
+
+    print("\n🚨 SEVERITY BREAKDOWN:")
+    for severity, count in report['severity_breakdown'].items():
+        print(f"   {severity}: {count}")
+
+    print("\n📋 CATEGORY BREAKDOWN:")
+    for category, count in report['category_breakdown'].items():
+        print(f"   {category}: {count}")
+
+    classification = report.get("classification")
+    if classification:
+        routes = classification["routes"]
+        print(f"\n🗂️  PRE-CLASSIFICATION:")
+        print(f"   Full analysis: {routes[ROUTE_FULL]}, security only: {routes[ROUTE_SECURITY]}, "
+              f"skipped: {routes[ROUTE_SKIP]}")
+        for path, decision in classification["files"].items():
+            if decision["route"] != ROUTE_FULL:
+                print(f"   {decision['route']:>8}  {path} ({decision['reason']})")
+
+    taint = report.get("taint")
+    if taint:
+        print(f"\n🧬 TAINT TRACKING:")
+        print(f"   Functions: {taint['functions']}, analyzed: {taint['analyzed']}, "
+              f"reused from cache: {taint['reused']}")
+
+    baseline = report.get("baseline")
+    if baseline:
+        print(f"\n📉 BASELINE:")
+        print(f"   {baseline['suppressed']} known findings suppressed "
+              f"({baseline['known_findings']} in {baseline['path']})")
+
+    artifacts = report.get("artifacts")
+    if artifacts:
+        print(f"\n🗃️  ARTIFACT CACHE:")
+        print(f"   Reads: {artifacts['reads']} ({artifacts['reads_avoided']} avoided), "
+              f"parses: {artifacts['parses']} ({artifacts['parses_avoided']} avoided), "
+              f"tokenizations: {artifacts['tokenizations']} ({artifacts['tokenizations_avoided']} avoided)")
+        print(f"   Duplicate contents shared: {artifacts['duplicate_contents']}, "
+              f"evictions: {artifacts['evictions']}")
+
+    stats = report.get("scheduler")
+    if stats:
+        print(f"\n⚙️  SCHEDULER:")
+        if "shards" in stats:
+            print(f"   Shards: {len(stats['shards'])}")
+        print(f"   Workers: {stats['workers']}, tasks: {stats['tasks']} "
+              f"({stats['chunks']} chunks) in {stats['batches']} batches")
+        print(f"   Makespan: {stats['makespan_seconds']}s "
+              f"(ideal {stats['ideal_makespan_seconds']}s)")
+        print(f"   Utilization: {stats['utilization']:.0%}, "
+              f"makespan efficiency: {stats['makespan_efficiency']:.0%}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="codeant", description="CodeAnt AI repository scanner")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    scan_parser = subparsers.add_parser("scan", help="Analyze every source file in a directory")
+    scan_parser.add_argument("directory")
+    scan_parser.add_argument("--workers", type=int, default=None,
+                             help="Number of worker processes (default: CPU count)")
+    scan_parser.add_argument("--timings", default=TIMINGS_FILE,
+                             help="File used to remember per-file timings between scans")
+    scan_parser.add_argument("--taint-cache", default=TAINT_CACHE_FILE,
+                             help="File used to memoize per-function taint summaries")
+    scan_parser.add_argument("--json", dest="json_path", default=None,
+                             help="Also write the full report as JSON")
+    scan_parser.add_argument("--html", dest="html_dir", default=None,
+                             help="Also write a browsable HTML report into this directory")
+    scan_parser.add_argument("--shard", default=None, metavar="INDEX/COUNT",
+                             help="Only analyze shard INDEX (0-based) of COUNT and write a partial report")
+    scan_parser.add_argument("--partial-dir", default="codeant-partials",
+                             help="Directory for partial reports when --shard is used")
+    scan_parser.add_argument("--baseline", default=None,
+                             help="Baseline file whose known findings are suppressed")
+    scan_parser.add_argument("--config", default=None,
+                             help="Rule configuration file (default: <directory>/.codeant.json if present)")
+    scan_parser.add_argument("--metrics-port", type=int, default=None,
+                             help="Serve Prometheus metrics on this local port while running")
+    scan_parser.add_argument("--metrics-file", default=None,
+                             help="Periodically write a JSON metrics snapshot to this file")
+    scan_parser.add_argument("--metrics-interval", type=float, default=10.0,
+                             help="Seconds between metrics snapshots (default: 10)")
+
+    merge_parser = subparsers.add_parser("merge", help="Combine shard partial reports")
+    merge_parser.add_argument("partial_dir")
+    merge_parser.add_argument("--root", default=None,
+                              help="Source tree for cross-module checks (default: root recorded by the shards)")
+    merge_parser.add_argument("--taint-cache", default=TAINT_CACHE_FILE,
+                              help="File used to memoize per-function taint summaries")
+    merge_parser.add_argument("--json", dest="json_path", default=None,
+                              help="Also write the full report as JSON")
+    merge_parser.add_argument("--html", dest="html_dir", default=None,
+                              help="Also write a browsable HTML report into this directory")
+    merge_parser.add_argument("--baseline", default=None,
+                              help="Baseline file whose known findings are suppressed")
+    merge_parser.add_argument("--config", default=None,
+                              help="Rule configuration file (default: <root>/.codeant.json if present)")
+
+    gate_parser = subparsers.add_parser("gate", help="Fail fast on issues at or above a severity (for pre-commit hooks)")
+    gate_parser.add_argument("paths", nargs="+", help="Files or directories to check")
+    gate_parser.add_argument("--severity", default="CRITICAL", choices=list(CodeAntSimulator.SEVERITY_RANK),
+                             help="Lowest severity that fails the gate (default: CRITICAL)")
+    gate_parser.add_argument("--workers", type=int, default=1,
+                             help="Number of worker processes (default: 1)")
+    gate_parser.add_argument("--stop-all", action="store_true",
+                             help="Stop the whole run at the first failing file")
+    gate_parser.add_argument("--baseline", default=None,
+                             help="Baseline file whose known findings never fail the gate")
+    gate_parser.add_argument("--config", default=None,
+                             help="Rule configuration file (default: ./.codeant.json if present)")
+
+    watch_parser = subparsers.add_parser("watch", help="Re-analyze files as they change")
+    watch_parser.add_argument("directory")
+    watch_parser.add_argument("--debounce", type=float, default=0.3,
+                              help="Seconds without changes before a batch is analyzed (default: 0.3)")
+    watch_parser.add_argument("--poll", action="store_true",
+                              help="Poll modification times instead of using inotify")
+    watch_parser.add_argument("--baseline", default=None,
+                              help="Baseline file whose known findings are suppressed")
+    watch_parser.add_argument("--config", default=None,
+                              help="Rule configuration file (default: <directory>/.codeant.json if present)")
+    watch_parser.add_argument("--metrics-port", type=int, default=None,
+                              help="Serve Prometheus metrics on this local port while running")
+    watch_parser.add_argument("--metrics-file", default=None,
+                              help="Periodically write a JSON metrics snapshot to this file")
+    watch_parser.add_argument("--metrics-interval", type=float, default=10.0,
+                              help="Seconds between metrics snapshots (default: 10)")
+
+    sample_parser = subparsers.add_parser("sample", help="Estimate repository health from a random sample")
+    sample_parser.add_argument("directory")
+    sample_parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    sample_parser.add_argument("--fraction", type=float, default=0.05,
+                               help="Initial share of each stratum to analyze (default: 0.05)")
+    sample_parser.add_argument("--time-budget", type=float, default=10.0,
+                               help="Seconds to keep refining the estimate (default: 10)")
+    sample_parser.add_argument("--workers", type=int, default=None,
+                               help="Number of worker processes (default: CPU count)")
+    sample_parser.add_argument("--timings", default=TIMINGS_FILE,
+                               help="File used to remember per-file timings between scans")
+    sample_parser.add_argument("--json", dest="json_path", default=None,
+                               help="Also write the final estimates as JSON")
+    sample_parser.add_argument("--config", default=None,
+                               help="Rule configuration file (default: <directory>/.codeant.json if present)")
+
+    baseline_parser = subparsers.add_parser("baseline", help="Record current findings as known")
+    baseline_parser.add_argument("directory")
+    baseline_parser.add_argument("--output", "-o", default=BASELINE_FILE,
+                                 help=f"Baseline file to write (default: {BASELINE_FILE})")
+    baseline_parser.add_argument("--workers", type=int, default=None,
+                                 help="Number of worker processes (default: CPU count)")
+    baseline_parser.add_argument("--timings", default=TIMINGS_FILE,
+                                 help="File used to remember per-file timings between scans")
+    baseline_parser.add_argument("--taint-cache", default=TAINT_CACHE_FILE,
+                                 help="File used to memoize per-function taint summaries")
+    baseline_parser.add_argument("--config", default=None,
+                                 help="Rule configuration file (default: <directory>/.codeant.json if present)")
+
+    args = parser.parse_args(argv)
+    root = getattr(args, "directory", ".")
+    partials = None
+    if args.command == "merge":
+        try:
+            partials = read_partials(args.partial_dir)
+        except (OSError, ValueError) as e:
+            print(f"❌ Cannot merge partial reports: {e}")
+            return 2
+        root = args.root or partials[0]["root"]
+    try:
+        config = Config.load(args.config, root)
+    except (OSError, ValueError) as e:
+        print(f"❌ Cannot load config: {e}")
+        return 2
+
+    if args.command == "baseline":
+        baseline = create_baseline(args.directory, args.output, args.workers, args.timings, args.taint_cache,
+                                   config)
+        print(f"✅ Baseline with {len(baseline)} known findings written to {args.output}")
+        return 0
+
+    if args.command == "sample":
+        estimates = sample_scan(args.directory, args.seed, args.fraction, args.time_budget,
+                                args.workers, args.timings, on_round=print_estimates, config=config)
+        if args.json_path:
+            with open(args.json_path, "w", encoding="utf-8") as f:
+                json.dump(estimates, f, indent=2)
+        return 0
+
+    if args.baseline:
+        try:
+            load_baseline(args.baseline)
+        except (OSError, ValueError) as e:
+            print(f"❌ Cannot load baseline: {e}")
+            return 2
+
+    exporters = []
+    if args.command in ("scan", "watch"):
+        try:
+            exporters = start_metrics(args.metrics_port, args.metrics_file, args.metrics_interval)
+        except OSError as e:
+            print(f"❌ Cannot start metrics endpoint: {e}")
+            return 2
+    try:
+        return run_command(args, config, partials)
+    finally:
+        for exporter in exporters:
+            exporter.close()
+
+
+def run_command(args: argparse.Namespace, config: Config,
+                partials: Optional[List[Dict[str, Any]]] = None) -> int:
+    """Run a scan, merge, gate or watch command once its inputs are validated"""
+    if args.command == "watch":
+        watch(args.directory, args.debounce, args.poll, args.baseline, config=config)
+        return 0
+
+    if args.command == "gate":
+        triggered = gate(args.paths, args.severity, args.workers, args.stop_all, args.baseline, config, config.root)
+        for path, issue in triggered:
+            print(f"❌ {path}:{issue['line']}: {issue['severity']} {issue['issue']} - {issue['description']}")
+            print(f"      Code: {issue['code_snippet']}")
+        if triggered:
+            print(f"\n🚫 Gate failed: issues at or above {args.severity} found")
+            return 1
+        print(f"✅ Gate passed: no issues at or above {args.severity}")
+        return 0
+
+    if args.command == "scan" and args.shard:
+        try:
+            index, count = (int(part) for part in args.shard.split("/"))
+            shard_files(args.directory, [], index, count)
+        except ValueError as e:
+            print(f"❌ Invalid shard '{args.shard}': {e}")
+            return 2
+        partial = scan_shard(args.directory, index, count, args.workers, args.timings, args.baseline, config)
+        path = write_partial(partial, args.partial_dir)
+        print(f"✅ Shard {index}/{count}: {len(partial['files'])} files analyzed, partial written to {path}")
+        return 0
+
+    # Analysis results are compacted per file as batches complete, and the
+    # HTML report is written one file report at a time once the cross-file
+    # passes are done; only JSON output needs every file report kept
+    html = HtmlReportWriter(args.html_dir, config.root) if args.html_dir else None
+    on_file = html.add_file if html else None
+    keep_files = bool(args.json_path)
+    if args.command == "scan":
+        report = scan(args.directory, args.workers, args.timings, args.taint_cache, args.baseline, config,
+                      on_file, keep_files)
+    else:
+        report = merge_partials(partials, args.root, args.taint_cache, args.baseline, config,
+                                on_file=on_file, keep_files=keep_files)
+
+    print_summary(report)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if html:
+        print(f"\n🌐 HTML report written to {html.close(summary_sections(report))}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
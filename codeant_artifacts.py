@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+CodeAnt AI Artifact Cache
+Reads, decodes, tokenizes and parses each source file at most once per scan
+and shares the results between every engine that needs them
+"""
+
+import os
+import re
+import ast
+import hashlib
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+WORD_RE = re.compile(r"\w+")
+
+# Parsed trees take far more memory than their source; these factors turn
+# source length into a rough per-artifact footprint for the memory bound
+TREE_BYTES_PER_CHAR = 20
+LINE_OVERHEAD_BYTES = 56
+TOKEN_OVERHEAD_BYTES = 56
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+STAT_NAMES = ("reads", "reads_avoided", "parses", "parses_avoided", "tokenizations",
+              "tokenizations_avoided", "duplicate_contents", "evictions")
+
+
+def combine_stats(*stats: Dict[str, int]) -> Dict[str, int]:
+    """Sum artifact statistics from several caches or scan phases"""
+    return {name: sum(s.get(name, 0) for s in stats) for name in STAT_NAMES}
+
+
+class SourceArtifacts:
+    """One file content and everything derived from it, each built on first use.
+
+    Consumers share the returned objects and must not modify them.
+    """
+
+    def __init__(self, data: bytes, cache: "ArtifactCache"):
+        self._data = data
+        self._cache = cache
+        self._text: Optional[str] = None
+        self._offsets: Optional[array] = None
+        self._lines: Optional[List[str]] = None
+        self._tokens: Optional[List[str]] = None
+        self._tree = None
+        self._parsed = False
+        self.footprint = len(data)
+        self.cached = True
+
+    def _grow(self, amount: int):
+        self.footprint += amount
+        if self.cached:
+            self._cache._grow(amount)
+
+    @property
+    def text(self) -> str:
+        """Decoded text with the newline handling of text-mode `open()`"""
+        if self._text is None:
+            text = self._data.decode("utf-8", errors="replace")
+            self._text = text.replace("\r\n", "\n").replace("\r", "\n") if "\r" in text else text
+            self._grow(len(self._text) - len(self._data))
+            self._data = b""
+        return self._text
+
+    @property
+    def line_offsets(self) -> array:
+        """Start offset of every line in `text`"""
+        if self._offsets is None:
+            offsets = array("L", [0])
+            offsets.extend(match.end() for match in re.finditer("\n", self.text))
+            self._offsets = offsets
+            self._grow(offsets.itemsize * len(offsets))
+        return self._offsets
+
+    def line_range(self, start: int, end: int) -> str:
+        """Text of lines [start, end) (0-based) without splitting the whole file"""
+        offsets = self.line_offsets
+        if start >= len(offsets):
+            return ""
+        stop = offsets[end] - 1 if end < len(offsets) else len(self.text)
+        return self.text[offsets[start]:stop]
+
+    @property
+    def lines(self) -> List[str]:
+        if self._lines is None:
+            self._lines = self.text.split("\n")
+            self._grow(len(self.text) + LINE_OVERHEAD_BYTES * len(self._lines))
+        return self._lines
+
+    @property
+    def tokens(self) -> List[str]:
+        """Identifier-like word tokens"""
+        if self._tokens is None:
+            self._cache.stats["tokenizations"] += 1
+            self._tokens = WORD_RE.findall(self.text)
+            self._grow(TOKEN_OVERHEAD_BYTES * len(self._tokens))
+        else:
+            self._cache.stats["tokenizations_avoided"] += 1
+        return self._tokens
+
+    @property
+    def tree(self) -> Optional[ast.Module]:
+        """Parsed Python module, or None for code that does not parse"""
+        if not self._parsed:
+            self._cache.stats["parses"] += 1
+            try:
+                self._tree = ast.parse(self.text)
+            except (SyntaxError, ValueError):
+                self._tree = None
+            self._parsed = True
+            if self._tree is not None:
+                self._grow(TREE_BYTES_PER_CHAR * len(self.text))
+        else:
+            self._cache.stats["parses_avoided"] += 1
+        return self._tree
+
+
+class ArtifactCache:
+    """Memory-bounded LRU of source artifacts, keyed by file identity and content.
+
+    A path is re-read only when its (device, inode, mtime, size) identity
+    changes. Entries are stored by content hash, so identical files (or a
+    touched but unchanged file) share one set of artifacts. The least
+    recently used entries are dropped once the estimated footprint exceeds
+    `max_bytes`; objects already handed out stay valid.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.stats = {name: 0 for name in STAT_NAMES}
+        self._identities: Dict[str, Tuple[Tuple[int, int, int, int], bytes]] = {}
+        self._entries: "OrderedDict[bytes, SourceArtifacts]" = OrderedDict()
+
+    def _grow(self, amount: int):
+        self.bytes += amount
+        self._evict()
+
+    def get(self, path: str) -> SourceArtifacts:
+        stat = os.stat(path)
+        identity = (stat.st_dev, stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        known = self._identities.get(path)
+        if known is not None and known[0] == identity and known[1] in self._entries:
+            self.stats["reads_avoided"] += 1
+            self._entries.move_to_end(known[1])
+            return self._entries[known[1]]
+
+        with open(path, "rb") as f:
+            data = f.read()
+        self.stats["reads"] += 1
+        digest = hashlib.blake2b(data, digest_size=16).digest()
+        entry = self._entries.get(digest)
+        if entry is None:
+            entry = self._entries[digest] = SourceArtifacts(data, self)
+            self.bytes += entry.footprint
+        else:
+            self.stats["duplicate_contents"] += 1
+            self._entries.move_to_end(digest)
+        self._identities[path] = (identity, digest)
+        self._evict()
+        return entry
+
+    def text(self, path: str) -> str:
+        return self.get(path).text
+
+    def stats_since(self, before: Dict[str, int]) -> Dict[str, int]:
+        """Statistics accumulated after `before` (an earlier copy of `stats`)"""
+        return {name: self.stats[name] - before.get(name, 0) for name in STAT_NAMES}
+
+    def _evict(self):
+        while self.bytes > self.max_bytes and len(self._entries) > 1:
+            _, entry = self._entries.popitem(last=False)
+            entry.cached = False
+            self.bytes -= entry.footprint
+            self.stats["evictions"] += 1
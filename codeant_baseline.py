@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+CodeAnt AI Baselines
+Stable issue fingerprints and a compact sorted-hash baseline file, used to
+suppress pre-existing findings on legacy repositories
+"""
+
+import os
+import re
+import sys
+import hashlib
+from array import array
+from bisect import bisect_left
+from typing import Iterable, List, Optional
+
+# The last four bytes are the fingerprint format version
+MAGIC = b"CABL0002"
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_SCOPE_RE = re.compile(r"^(\s*)(?:async\s+def|def|class|function)\s+(\w+)")
+
+
+def normalize_snippet(snippet: str) -> str:
+    """Collapse whitespace so re-indentation does not change a fingerprint"""
+    return _WHITESPACE_RE.sub(" ", snippet).strip()
+
+
+def relative_path(path: str, root: str) -> str:
+    """Root-relative, '/'-separated path as used in fingerprints"""
+    return os.path.relpath(path, root).replace(os.sep, "/")
+
+
+def issue_fingerprint(issue: str, snippet: str, function: str, path: str = "") -> int:
+    """64-bit fingerprint of a finding.
+
+    Built from the rule, the normalized snippet, the enclosing function and
+    the root-relative path of the file, never the line number, so findings
+    survive unrelated edits above them while the same code in another file
+    is still reported.
+    """
+    key = f"{issue}\x00{normalize_snippet(snippet)}\x00{function}\x00{path}".encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "big")
+
+
+def enclosing_scopes(lines: List[str]) -> List[str]:
+    """Dotted name of the enclosing def/class for every line (1-based, index 0 unused)"""
+    scopes = [""]
+    stack = []
+    for line in lines:
+        stripped = line.strip()
+        if stripped and not stripped.startswith(("#", "//")):
+            indent = len(line) - len(line.lstrip())
+            while stack and stack[-1][0] >= indent:
+                stack.pop()
+            match = _SCOPE_RE.match(line)
+            if match:
+                stack.append((indent, match.group(2)))
+        scopes.append(".".join(name for _, name in stack))
+    return scopes
+
+
+class Baseline:
+    """Sorted array of 64-bit fingerprints with binary-search lookups.
+
+    Costs 8 bytes per known finding in memory and on disk, and lookups are
+    O(log n) without building any per-finding Python objects.
+    """
+
+    def __init__(self, fingerprints: Optional[Iterable[int]] = None):
+        self.hashes = array("Q", sorted(set(fingerprints or ())))
+
+    def __contains__(self, fingerprint: int) -> bool:
+        index = bisect_left(self.hashes, fingerprint)
+        return index < len(self.hashes) and self.hashes[index] == fingerprint
+
+    def __len__(self) -> int:
+        return len(self.hashes)
+
+    @classmethod
+    def load(cls, path: str) -> "Baseline":
+        baseline = cls()
+        with open(path, "rb") as f:
+            magic = f.read(len(MAGIC))
+            if magic[:4] == MAGIC[:4] and magic != MAGIC:
+                raise ValueError(f"{path} uses an older fingerprint format; re-create it with `codeant baseline`")
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a CodeAnt baseline file")
+            data = array("Q")
+            data.frombytes(f.read())
+        if sys.byteorder != "big":
+            data.byteswap()
+        baseline.hashes = data
+        return baseline
+
+    def save(self, path: str):
+        """Write the fingerprints big-endian after a magic header"""
+        data = array("Q", self.hashes)
+        if sys.byteorder != "big":
+            data.byteswap()
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(MAGIC)
+            f.write(data.tobytes())
+        os.replace(temp_path, path)
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+CodeAnt AI Configuration
+Rule enable/disable switches and severity overrides from a JSON config file,
+optionally scoped to parts of the tree with path globs
+"""
+
+import os
+import json
+from collections import namedtuple
+from fnmatch import fnmatchcase
+from typing import Any, Dict, Optional, Tuple
+
+from codeant_simulator import CodeAntSimulator
+
+CONFIG_FILE = ".codeant.json"
+# Extensions of the files a scan analyzes, to recognize globs naming files
+SOURCE_EXTENSIONS = (".py", ".js")
+
+# Rule -> owning pass, for the per-file rules and the repository-level ones
+RULES = {rule: owner for rule, owner, _, _ in CodeAntSimulator.RULES}
+RULES["cross_file_duplication"] = "maintainability"
+
+
+class RuleSet(namedtuple("RuleSet", ["disabled", "severity"])):
+    """Rules switched off and severity overrides in effect for one directory"""
+    __slots__ = ()
+
+    def enabled(self, rule: str) -> bool:
+        return rule not in self.disabled
+
+    def active_passes(self, passes: Tuple[str, ...]) -> Tuple[str, ...]:
+        """The passes that still have at least one enabled rule"""
+        return tuple(p for p in passes
+                     if any(owner == p and rule not in self.disabled for rule, owner in RULES.items()))
+
+
+def _expand(name: str) -> Tuple[str, ...]:
+    """A rule name, or a pass name standing for all of its rules"""
+    rules = tuple(rule for rule, owner in RULES.items() if owner == name)
+    if not rules and name in RULES:
+        rules = (name,)
+    if not rules:
+        raise ValueError(f"Unknown rule or pass '{name}' (known rules: {', '.join(sorted(RULES))})")
+    return rules
+
+
+def _validate_section(section: Dict[str, Any], where: str):
+    for name, enabled in section.get("rules", {}).items():
+        _expand(name)
+        if not isinstance(enabled, bool):
+            raise ValueError(f"{where}: rule '{name}' must be true or false")
+    for name, severity in section.get("severity", {}).items():
+        _expand(name)
+        if severity not in CodeAntSimulator.SEVERITY_RANK:
+            raise ValueError(f"{where}: unknown severity '{severity}' for '{name}'")
+
+
+def _names_files(pattern: str) -> bool:
+    """Whether the last component of a path glob is a file name, like '*_test.py'.
+
+    Rule sets are resolved per directory, so such a glob could never match.
+    """
+    last = pattern.rstrip("/").rsplit("/", 1)[-1]
+    extension = os.path.splitext(last)[1]
+    return extension in SOURCE_EXTENSIONS or (bool(extension) and any(c in last for c in "*?["))
+
+
+def _directory_pattern(pattern: str) -> str:
+    """Reduce 'dir/**' and 'dir/*' to 'dir', which also covers files directly in it"""
+    pattern = pattern.strip("/")
+    while pattern.endswith(("/**", "/*")):
+        pattern = pattern.rsplit("/", 1)[0]
+    return pattern
+
+
+class Config:
+    """Resolves the rule set for each directory of a scanned tree.
+
+    The top-level "rules" and "severity" sections apply everywhere; each
+    entry of "overrides" applies its own sections to directories matching
+    one of its "paths" globs (relative to the root, and to everything below
+    a matching directory; "dir/**" and "dir/*" cover "dir" itself too).
+    Globs naming files are rejected. Later overrides win. Resolution happens once per
+    directory and is cached, so files are only ever a dictionary lookup.
+    """
+
+    def __init__(self, data: Optional[Dict[str, Any]] = None, root: str = "."):
+        data = data or {}
+        _validate_section(data, "config")
+        for index, override in enumerate(data.get("overrides", [])):
+            if not override.get("paths"):
+                raise ValueError(f"overrides[{index}] needs a non-empty 'paths' list")
+            for pattern in override["paths"]:
+                if _names_files(pattern):
+                    raise ValueError(f"overrides[{index}]: path '{pattern}' names files, but overrides apply "
+                                     f"to directories; use a directory glob such as 'tests/**'")
+            _validate_section(override, f"overrides[{index}]")
+        self.data = data
+        self.root = root
+        self._resolved: Dict[str, RuleSet] = {}
+
+    @classmethod
+    def load(cls, path: Optional[str], root: str = ".") -> "Config":
+        """Read `path`, or `<root>/.codeant.json` if it exists; no file means defaults"""
+        if path is None:
+            path = os.path.join(root, CONFIG_FILE)
+            if not os.path.isfile(path):
+                return cls(root=root)
+        with open(path, encoding="utf-8") as f:
+            try:
+                data = json.load(f)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path} is not valid JSON: {e}")
+        return cls(data, root)
+
+    @staticmethod
+    def _matches(directory: str, patterns) -> bool:
+        parts = [] if directory == "." else directory.split("/")
+        candidates = ["/".join(parts[:i]) for i in range(1, len(parts) + 1)] or ["."]
+        for pattern in patterns:
+            pattern = _directory_pattern(pattern)
+            for candidate in candidates:
+                if fnmatchcase(candidate, pattern) or (
+                        pattern.startswith("**/") and fnmatchcase(candidate, pattern[3:])):
+                    return True
+        return False
+
+    def for_directory(self, directory: str) -> RuleSet:
+        if directory not in self._resolved:
+            relative = os.path.relpath(directory or ".", self.root).replace(os.sep, "/")
+            disabled = set()
+            severity: Dict[str, str] = {}
+            sections = [self.data] + [override for override in self.data.get("overrides", [])
+                                      if self._matches(relative, override["paths"])]
+            for section in sections:
+                for name, enabled in section.get("rules", {}).items():
+                    for rule in _expand(name):
+                        (disabled.discard if enabled else disabled.add)(rule)
+                for name, level in section.get("severity", {}).items():
+                    for rule in _expand(name):
+                        severity[rule] = level
+            self._resolved[directory] = RuleSet(frozenset(disabled), severity)
+        return self._resolved[directory]
+
+    def for_file(self, path: str) -> RuleSet:
+        return self.for_directory(os.path.dirname(path))
+
+    def enabled_anywhere(self, rule: str) -> bool:
+        """False only when no directory can have `rule` switched on"""
+        if rule not in self.for_directory(self.root).disabled:
+            return True
+        return any(override.get("rules", {}).get(name) for override in self.data.get("overrides", [])
+                   for name in (rule, RULES[rule]))
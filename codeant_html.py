@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+CodeAnt AI HTML Reports
+Writes a static, offline-viewable report: a small index page with the
+repository breakdowns plus per-directory issue chunks loaded on demand
+"""
+
+import os
+import json
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional
+
+SEVERITIES = ("CRITICAL", "HIGH", "MEDIUM", "LOW")
+# Issues are stored as rows of these fields to keep chunk files small
+ROW_FIELDS = ("file", "line", "severity", "category", "issue", "description", "suggestion", "code_snippet")
+
+# Chunk files are plain scripts rather than JSON because browsers refuse to
+# fetch() from file:// URLs but happily load <script src> from them
+CHUNK_ISSUES = 2000
+MAX_OPEN_CHUNKS = 32
+
+
+def _script_json(data: Any) -> str:
+    """JSON that is safe to embed inside an inline <script> element"""
+    return json.dumps(data, separators=(",", ":")).replace("</", "<\\/")
+
+
+class HtmlReportWriter:
+    """Streams per-file reports into an HTML report directory.
+
+    Issues are appended to their directory's chunk file as each file report
+    arrives, so memory holds only per-directory counters, never the issue
+    list. Directories with many issues are split into several chunks. At
+    most `max_open` chunk files are open at once; others are reopened for
+    appending when needed.
+    """
+
+    def __init__(self, output_dir: str, root: str = "", chunk_issues: int = CHUNK_ISSUES,
+                 max_open: int = MAX_OPEN_CHUNKS):
+        self.output_dir = output_dir
+        self.root = root
+        self.chunk_issues = chunk_issues
+        self.max_open = max_open
+        os.makedirs(os.path.join(output_dir, "chunks"), exist_ok=True)
+        self.directories: Dict[str, Dict[str, Any]] = {}
+        self.severity_counts = {severity: 0 for severity in SEVERITIES}
+        self.category_counts: Dict[str, int] = {}
+        self.files = 0
+        self.code_lines = 0
+        self.score_totals = {"security_score": 0, "quality_score": 0}
+        self._open: "OrderedDict[str, Any]" = OrderedDict()
+
+    def _chunk_name(self, directory: Dict[str, Any], part: int) -> str:
+        return f"d{directory['id']}-{part}.js"
+
+    def _handle(self, name: str, new: bool):
+        handle = self._open.pop(name, None)
+        if handle is None:
+            if len(self._open) >= self.max_open:
+                _, oldest = self._open.popitem(last=False)
+                oldest.close()
+            handle = open(os.path.join(self.output_dir, "chunks", name), "w" if new else "a", encoding="utf-8")
+        self._open[name] = handle
+        return handle
+
+    def add_file(self, report: Dict[str, Any]):
+        """Add one per-file report (the shape `_generate_report` returns)"""
+        path = report["filename"]
+        relative = os.path.relpath(path, self.root) if self.root else path
+        directory_name = os.path.dirname(relative) or "."
+        directory = self.directories.get(directory_name)
+        if directory is None:
+            directory = self.directories[directory_name] = {
+                "id": len(self.directories), "files": 0, "issues": 0, "parts": 0,
+                "severity": {severity: 0 for severity in SEVERITIES},
+            }
+        directory["files"] += 1
+        self.files += 1
+        self.code_lines += report["metrics"]["code_lines"]
+        for field in self.score_totals:
+            self.score_totals[field] += report["metrics"][field]
+        for category, count in report["category_breakdown"].items():
+            self.category_counts[category] = self.category_counts.get(category, 0) + count
+
+        for issue in report["issues"]:
+            position = directory["issues"] % self.chunk_issues
+            if position == 0:
+                if directory["parts"]:
+                    self._finish(self._chunk_name(directory, directory["parts"] - 1))
+                name = self._chunk_name(directory, directory["parts"])
+                directory["parts"] += 1
+                handle = self._handle(name, new=True)
+                handle.write(f"CodeAnt.chunk({json.dumps(name)},[\n")
+            else:
+                handle = self._handle(self._chunk_name(directory, directory["parts"] - 1), new=False)
+                handle.write(",\n")
+            row = [relative] + [issue[field] for field in ROW_FIELDS[1:]]
+            handle.write(json.dumps(row))
+            directory["issues"] += 1
+            directory["severity"][issue["severity"]] += 1
+            self.severity_counts[issue["severity"]] += 1
+
+    def _finish(self, name: str):
+        self._handle(name, new=False).write("\n]);\n")
+        self._open.pop(name).close()
+
+    def close(self, summary: Optional[Dict[str, Any]] = None) -> str:
+        """Finish every chunk and write index.html; returns its path.
+
+        `summary` may carry extra repository sections (taint, baseline,
+        scheduler) to show on the index page.
+        """
+        for directory in self.directories.values():
+            if directory["parts"]:
+                self._finish(self._chunk_name(directory, directory["parts"] - 1))
+
+        total = sum(self.severity_counts.values())
+        index = {
+            "root": self.root,
+            "fields": ROW_FIELDS,
+            "total_issues": total,
+            "files_analyzed": self.files,
+            "severity_breakdown": self.severity_counts,
+            "category_breakdown": dict(sorted(self.category_counts.items(), key=lambda item: -item[1])),
+            "metrics": {
+                "code_lines": self.code_lines,
+                "issues_per_100_lines": round(total / max(self.code_lines, 1) * 100, 2),
+                "average_security_score": round(self.score_totals["security_score"] / max(self.files, 1), 1),
+                "average_quality_score": round(self.score_totals["quality_score"] / max(self.files, 1), 1),
+            },
+            "directories": [dict(directory, name=name) for name, directory in sorted(self.directories.items())],
+            "summary": summary or {},
+        }
+        path = os.path.join(self.output_dir, "index.html")
+        temp_path = path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(INDEX_TEMPLATE.replace("/*INDEX*/null", _script_json(index)))
+        os.replace(temp_path, path)
+        return path
+
+
+def summary_sections(report: Dict[str, Any]) -> Dict[str, Any]:
+    """Repository sections of a report shown on the index page"""
+    return {key: report[key] for key in ("taint", "baseline", "scheduler") if key in report}
+
+
+def write_html_report(report: Dict[str, Any], output_dir: str,
+                      file_reports: Optional[Iterable[Dict[str, Any]]] = None) -> str:
+    """Write a repository report as HTML.
+
+    `file_reports` may be any iterable (e.g. a generator) of per-file
+    reports; it defaults to the files of `report`.
+    """
+    writer = HtmlReportWriter(output_dir, report.get("root", ""))
+    for file_report in report["files"] if file_reports is None else file_reports:
+        writer.add_file(file_report)
+    return writer.close(summary_sections(report))
+
+
+INDEX_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>CodeAnt AI Report</title>
+<style>
+body { font-family: -apple-system, "Segoe UI", Helvetica, Arial, sans-serif; margin: 2em; color: #222; }
+h1 { margin-bottom: 0.2em; }
+.muted { color: #777; }
+.cards { display: flex; flex-wrap: wrap; gap: 1em; margin: 1em 0; }
+.card { border: 1px solid #ddd; border-radius: 6px; padding: 0.8em 1.2em; min-width: 9em; }
+.card b { display: block; font-size: 1.6em; }
+table { border-collapse: collapse; width: 100%; margin: 0.5em 0 1.5em; }
+th, td { border-bottom: 1px solid #eee; padding: 0.3em 0.5em; text-align: left; vertical-align: top; }
+th { background: #f6f6f6; }
+td.num { text-align: right; }
+.bar { background: #4a7bd0; height: 0.8em; display: inline-block; }
+.CRITICAL { color: #b00020; font-weight: bold; } .HIGH { color: #d35400; }
+.MEDIUM { color: #b7950b; } .LOW { color: #2e86c1; }
+code { background: #f6f6f6; padding: 0 0.2em; white-space: pre-wrap; }
+#filters { display: flex; flex-wrap: wrap; gap: 1em; align-items: center; margin: 0.5em 0; }
+button { cursor: pointer; }
+</style>
+</head>
+<body>
+<h1>📊 CodeAnt AI Repository Scan</h1>
+<div class="muted" id="root"></div>
+<div class="cards" id="cards"></div>
+<h2>🚨 Severity Breakdown</h2><table id="severity"></table>
+<h2>📋 Category Breakdown</h2><table id="category"></table>
+<div id="summary"></div>
+<h2>📁 Directories</h2>
+<table id="directories"></table>
+<h2>🔎 Issues</h2>
+<div id="filters">
+  <span id="severity-filters"></span>
+  <select id="category-filter"><option value="">All categories</option></select>
+  <input id="text-filter" type="search" placeholder="Filter by file, issue or code">
+  <button id="load-all">Load all directories</button>
+</div>
+<div class="muted" id="status">Select a directory above to load its issues.</div>
+<table id="issues"></table>
+<button id="more" hidden>Show more</button>
+<script>
+var INDEX = /*INDEX*/null;
+var PAGE = 500;
+var CodeAnt = { rows: [], requested: {}, loaded: {}, shown: PAGE };
+
+function el(tag, text, cls) {
+  var node = document.createElement(tag);
+  if (text !== undefined) node.textContent = text;
+  if (cls) node.className = cls;
+  return node;
+}
+function row(table, cells, header) {
+  var tr = el("tr");
+  cells.forEach(function (cell) {
+    var td = el(header ? "th" : "td", undefined, typeof cell === "number" ? "num" : "");
+    if (cell instanceof Node) td.appendChild(cell); else td.textContent = String(cell);
+    tr.appendChild(td);
+  });
+  table.appendChild(tr);
+  return tr;
+}
+function breakdown(table, counts) {
+  var max = Math.max.apply(null, Object.values(counts).concat([1]));
+  row(table, ["", "Issues", ""], true);
+  Object.keys(counts).forEach(function (key) {
+    var bar = el("span", "", "bar"); bar.style.width = (200 * counts[key] / max) + "px";
+    row(table, [el("span", key, key), counts[key], bar]);
+  });
+}
+
+CodeAnt.chunk = function (name, rows) {
+  CodeAnt.loaded[name] = true;
+  Array.prototype.push.apply(CodeAnt.rows, rows);
+  render();
+};
+CodeAnt.loadDirectory = function (directory) {
+  for (var part = 0; part < directory.parts; part++) {
+    var name = "d" + directory.id + "-" + part + ".js";
+    if (CodeAnt.requested[name]) continue;
+    CodeAnt.requested[name] = true;
+    var script = document.createElement("script");
+    script.src = "chunks/" + name;
+    document.body.appendChild(script);
+  }
+  render();
+};
+
+function render() {
+  var severities = {};
+  document.querySelectorAll("#severity-filters input").forEach(function (box) { severities[box.value] = box.checked; });
+  var category = document.getElementById("category-filter").value;
+  var text = document.getElementById("text-filter").value.toLowerCase();
+  var F = INDEX.fields.reduce(function (acc, field, i) { acc[field] = i; return acc; }, {});
+  var matches = CodeAnt.rows.filter(function (r) {
+    return severities[r[F.severity]] && (!category || r[F.category] === category) &&
+      (!text || (r[F.file] + " " + r[F.issue] + " " + r[F.code_snippet]).toLowerCase().indexOf(text) >= 0);
+  });
+  var table = document.getElementById("issues");
+  table.textContent = "";
+  row(table, ["File", "Line", "Severity", "Category", "Issue", "Code", "Suggestion"], true);
+  matches.slice(0, CodeAnt.shown).forEach(function (r) {
+    var issue = el("span", r[F.issue]); issue.title = r[F.description];
+    row(table, [r[F.file], r[F.line], el("span", r[F.severity], r[F.severity]), r[F.category], issue,
+                el("code", r[F.code_snippet]), r[F.suggestion]]);
+  });
+  var pending = Object.keys(CodeAnt.requested).length - Object.keys(CodeAnt.loaded).length;
+  document.getElementById("status").textContent = matches.length + " matching of " + CodeAnt.rows.length +
+    " loaded issues" + (pending ? " (" + pending + " chunks loading)" : "");
+  document.getElementById("more").hidden = matches.length <= CodeAnt.shown;
+}
+
+document.getElementById("root").textContent = INDEX.root;
+var cards = document.getElementById("cards");
+[["Files Analyzed", INDEX.files_analyzed], ["Total Issues", INDEX.total_issues],
+ ["Code Lines", INDEX.metrics.code_lines], ["Issues / 100 Lines", INDEX.metrics.issues_per_100_lines],
+ ["Avg Security Score", INDEX.metrics.average_security_score],
+ ["Avg Quality Score", INDEX.metrics.average_quality_score]].forEach(function (card) {
+  var div = el("div", card[0], "card"); div.insertBefore(el("b", String(card[1])), div.firstChild);
+  cards.appendChild(div);
+});
+breakdown(document.getElementById("severity"), INDEX.severity_breakdown);
+breakdown(document.getElementById("category"), INDEX.category_breakdown);
+
+var summary = document.getElementById("summary");
+Object.keys(INDEX.summary).forEach(function (section) {
+  summary.appendChild(el("h2", section.charAt(0).toUpperCase() + section.slice(1)));
+  var table = el("table");
+  Object.keys(INDEX.summary[section]).forEach(function (key) {
+    var value = INDEX.summary[section][key];
+    if (typeof value !== "object") row(table, [key, value]);
+  });
+  summary.appendChild(table);
+});
+
+var directories = document.getElementById("directories");
+row(directories, ["Directory", "Files", "Issues"].concat(Object.keys(INDEX.severity_breakdown)).concat([""]), true);
+INDEX.directories.forEach(function (directory) {
+  var button = el("button", "Load");
+  button.disabled = !directory.parts;
+  button.onclick = function () { CodeAnt.loadDirectory(directory); button.disabled = true; };
+  row(directories, [directory.name, directory.files, directory.issues].concat(
+    Object.keys(directory.severity).map(function (s) { return directory.severity[s]; })).concat([button]));
+});
+
+var boxes = document.getElementById("severity-filters");
+Object.keys(INDEX.severity_breakdown).forEach(function (severity) {
+  var label = el("label", " " + severity, severity), box = el("input");
+  box.type = "checkbox"; box.value = severity; box.checked = true; box.onchange = render;
+  label.insertBefore(box, label.firstChild); boxes.appendChild(label);
+});
+var select = document.getElementById("category-filter");
+Object.keys(INDEX.category_breakdown).forEach(function (category) {
+  var option = el("option", category); option.value = category; select.appendChild(option);
+});
+select.onchange = render;
+document.getElementById("text-filter").oninput = function () { CodeAnt.shown = PAGE; render(); };
+document.getElementById("more").onclick = function () { CodeAnt.shown += PAGE; render(); };
+document.getElementById("load-all").onclick = function () {
+  INDEX.directories.forEach(CodeAnt.loadDirectory);
+  document.querySelectorAll("#directories button").forEach(function (b) { b.disabled = true; });
+};
+</script>
+</body>
+</html>
+"""
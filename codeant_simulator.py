@@ -7,38 +7,435 @@ Run this during your pitch to show real-time code analysis
 
 import re
 import ast
+import math
 import time
 import random
-from typing import List, Dict, Any
+from bisect import bisect_left
+from collections import Counter
+from itertools import accumulate
+from typing import List, Dict, Any, Optional, Sequence, Tuple
 from datetime import datetime
 
+from codeant_taint import find_sql_injections
+from codeant_baseline import issue_fingerprint, enclosing_scopes
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; entropy scoring falls back to pure Python
+    np = None
+
+# Line-level SQL injection heuristic of the security pattern pass
+SQL_CONCAT_PATTERN = r"SELECT.*FROM.*WHERE.*=.*\+"
+
+# String literals long enough to be credentials, without whitespace
+STRING_LITERAL_RE = re.compile(r"""(["'])([^\s"'\\]{16,})\1""")
+
+# Well-known token formats, checked before any entropy scoring. A literal
+# must match the whole shape (prefix, charset and length), so identifiers
+# that merely share a prefix, like "sk-learn-...", fall through to scoring.
+SECRET_TOKEN_PATTERNS = (
+    (r"sk-(?:proj-[A-Za-z0-9_-]{40,}|[A-Za-z0-9]{20,})", "OpenAI-style secret key"),
+    (r"sk_live_[A-Za-z0-9]{16,}", "Stripe live secret key"),
+    (r"rk_live_[A-Za-z0-9]{16,}", "Stripe restricted key"),
+    (r"ghp_[A-Za-z0-9]{36,}", "GitHub personal access token"),
+    (r"gho_[A-Za-z0-9]{36,}", "GitHub OAuth token"),
+    (r"ghs_[A-Za-z0-9]{36,}", "GitHub app token"),
+    (r"github_pat_[A-Za-z0-9_]{22,}", "GitHub fine-grained token"),
+    (r"glpat-[A-Za-z0-9_-]{20,}", "GitLab personal access token"),
+    (r"xoxb-[0-9]{8,}-[A-Za-z0-9-]{16,}", "Slack bot token"),
+    (r"xoxp-[0-9]{8,}-[A-Za-z0-9-]{16,}", "Slack user token"),
+    (r"AKIA[0-9A-Z]{16}", "AWS access key ID"),
+    (r"AIza[0-9A-Za-z_-]{35}", "Google API key"),
+    (r"SG\.[A-Za-z0-9_-]{16,}\.[A-Za-z0-9_-]{16,}", "SendGrid API key"),
+    (r"eyJ[\w-]+\.eyJ[\w-]+\.[\w-]+", "JSON Web Token"),
+)
+# All formats as one alternation with a group per format, matched once
+# against every literal of a file joined by newlines
+SECRET_TOKEN_RE = re.compile("^(?:" + "|".join(f"({pattern})" for pattern, _ in SECRET_TOKEN_PATTERNS) + ")$",
+                             re.MULTILINE)
+
+HEX_CHARS = frozenset("0123456789abcdefABCDEF")
+BASE64_CHARS = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/=_-")
+
+# Character class bits, combined per literal with AND (every character is
+# in the class) and OR (some character is in the class)
+HEX, BASE64, UPPER, LOWER, DIGIT = 1, 2, 4, 8, 16
+MIXED = UPPER | LOWER | DIGIT
+
+
+def _class_bits(char: str) -> int:
+    return ((HEX if char in HEX_CHARS else 0) | (BASE64 if char in BASE64_CHARS else 0) |
+            (UPPER if "A" <= char <= "Z" else 0) | (LOWER if "a" <= char <= "z" else 0) |
+            (DIGIT if "0" <= char <= "9" else 0))
+
+
+CLASS_TABLE = [_class_bits(chr(byte)) for byte in range(256)]
+
+# Minimum length and entropy (bits per character) for each charset to look
+# random. Hex must be longer than MD5/SHA-1 digests and dashless UUIDs, and
+# base64 must mix upper case, lower case and digits, which rules out plain
+# words and identifiers.
+ENTROPY_THRESHOLDS = {"hex": (41, 3.5), "base64": (20, 4.2)}
+
+# Literals are scored in blocks so the histogram matrix stays small
+ENTROPY_BLOCK = 1024
+
+
+def literal_entropies(literals: List[str]) -> List[float]:
+    """Shannon entropy in bits per character for each literal, computed in bulk.
+
+    With NumPy every block of literals is flattened into one byte array and a
+    single bincount builds all per-literal byte histograms at once. The target
+    is at least 1M literals/second for 20-48 character tokens (the per-string
+    Python fallback manages roughly 80k/second).
+    """
+    if np is None:
+        entropies = []
+        for literal in literals:
+            total = len(literal)
+            entropies.append(-sum(c / total * math.log2(c / total)
+                                  for c in Counter(literal).values()))
+        return entropies
+
+    entropies = []
+    for start in range(0, len(literals), ENTROPY_BLOCK):
+        block = literals[start:start + ENTROPY_BLOCK]
+        # latin-1 keeps one byte per character, so lengths line up with the text
+        data = np.frombuffer("".join(block).encode("latin-1", "replace"), dtype=np.uint8)
+        lengths = np.fromiter(map(len, block), dtype=np.int64, count=len(block))
+        owner = np.repeat(np.arange(len(block), dtype=np.int64), lengths)
+        keys = (owner << 8) | data
+        counts = np.bincount(keys, minlength=len(block) * 256)
+        # H = log2(n) - sum(c * log2(c)) / n; a byte occurring c times shows up
+        # c times in `keys`, so summing log2(c) per occurrence gives c * log2(c)
+        weighted = np.bincount(owner, weights=np.log2(counts[keys]), minlength=len(block))
+        entropies.extend((np.log2(lengths) - weighted / lengths).tolist())
+    return entropies
+
+
+def charset_bits(literals: List[str]) -> Tuple[Sequence[int], Sequence[int]]:
+    """Per literal, the class bits shared by all characters and by any character.
+
+    With NumPy the literals are flattened into one byte array, mapped through
+    CLASS_TABLE and reduced per literal with two `reduceat` calls, and the
+    results are arrays rather than lists.
+    """
+    if not literals:
+        return [], []
+    if np is None:
+        shared, present = [], []
+        for literal in literals:
+            bits = [CLASS_TABLE[ord(c)] if ord(c) < 256 else 0 for c in set(literal)]
+            all_bits = any_bits = bits[0]
+            for b in bits[1:]:
+                all_bits &= b
+                any_bits |= b
+            shared.append(all_bits)
+            present.append(any_bits)
+        return shared, present
+    data = np.frombuffer("".join(literals).encode("latin-1", "replace"), dtype=np.uint8)
+    classes = np.asarray(CLASS_TABLE, dtype=np.uint8)[data]
+    lengths = np.fromiter(map(len, literals), dtype=np.int64, count=len(literals))
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    return np.bitwise_and.reduceat(classes, starts), np.bitwise_or.reduceat(classes, starts)
+
+
+def entropy_candidates(literals: List[str]) -> List[Tuple[int, str]]:
+    """(index, charset) of the literals long and varied enough to be scored.
+
+    A literal qualifies as hex when it is entirely hex digits, or as base64
+    when it is entirely base64 and mixes upper case, lower case and digits,
+    and it is at least as long as that charset's threshold.
+    """
+    min_hex, min_base64 = ENTROPY_THRESHOLDS["hex"][0], ENTROPY_THRESHOLDS["base64"][0]
+    shared, present = charset_bits(literals)
+    if np is None:
+        candidates = []
+        for index, literal in enumerate(literals):
+            if shared[index] & HEX:
+                if len(literal) >= min_hex:
+                    candidates.append((index, "hex"))
+            elif shared[index] & BASE64 and present[index] & MIXED == MIXED:
+                if len(literal) >= min_base64:
+                    candidates.append((index, "base64"))
+        return candidates
+    lengths = np.fromiter(map(len, literals), dtype=np.int64, count=len(literals))
+    is_hex = (shared & HEX) != 0
+    is_hex_candidate = is_hex & (lengths >= min_hex)
+    is_base64_candidate = (~is_hex & ((shared & BASE64) != 0) & ((present & MIXED) == MIXED) &
+                           (lengths >= min_base64))
+    indices = np.flatnonzero(is_hex_candidate | is_base64_candidate)
+    return list(zip(indices.tolist(), np.where(is_hex[indices], "hex", "base64").tolist()))
+
+
+def classify_charset(literal: str) -> str:
+    """Classify a literal as 'jwt', 'hex', 'base64' or 'other'"""
+    match = SECRET_TOKEN_RE.fullmatch(literal)
+    if match and SECRET_TOKEN_PATTERNS[match.lastindex - 1][1] == "JSON Web Token":
+        return "jwt"
+    (shared,), _ = charset_bits([literal])
+    if shared & HEX:
+        return "hex"
+    if shared & BASE64:
+        return "base64"
+    return "other"
+
+
+def find_secret_literals(lines: List[str]) -> List[Tuple[int, str, str, str]]:
+    """Find string literals that look like credentials.
+
+    Every step runs once per file rather than once per literal: one regex
+    scan extracts the literals, one scan of the combined token regex over
+    the newline-joined literals finds known formats, charsets are classified
+    in bulk and entropies scored in bulk. With NumPy the whole detector
+    handles roughly 450k literals/second on ordinary string literals and
+    about 220k/second on random 20-48 character tokens, most of which end up
+    reported (see `benchmark_secret_literals`); line extraction and building
+    the findings dominate. Returns (line number, literal, severity, reason)
+    tuples.
+    """
+    lines_of, literals = [], []
+    findall = STRING_LITERAL_RE.findall
+    for i, line in enumerate(lines, 1):
+        for _, literal in findall(line):
+            lines_of.append(i)
+            literals.append(literal)
+    if not literals:
+        return []
+
+    tokens = {}
+    joined = "\n".join(literals)
+    if SECRET_TOKEN_RE.search(joined):
+        # Offset of each literal in `joined`; a match always starts one
+        starts = [0, *accumulate(len(literal) + 1 for literal in literals)]
+        for match in SECRET_TOKEN_RE.finditer(joined):
+            index = bisect_left(starts, match.start())
+            tokens[index] = SECRET_TOKEN_PATTERNS[match.lastindex - 1][1]
+    findings = [(lines_of[index], literals[index], "CRITICAL", reason) for index, reason in tokens.items()]
+
+    to_score = [(index, charset) for index, charset in entropy_candidates(literals) if index not in tokens]
+    entropies = literal_entropies([literals[index] for index, _ in to_score])
+    for (index, charset), entropy in zip(to_score, entropies):
+        if entropy >= ENTROPY_THRESHOLDS[charset][1]:
+            findings.append((lines_of[index], literals[index], "HIGH",
+                             f"high-entropy {charset} string ({entropy:.1f} bits/char)"))
+    return sorted(findings)
+
+
+def benchmark_secret_literals(count: int = 200_000, seed: int = 0) -> float:
+    """Literals/second of the whole secret detector on random 20-48 character tokens"""
+    rng = random.Random(seed)
+    alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_-"
+    lines = [f'token_{n} = "{"".join(rng.choice(alphabet) for _ in range(rng.randint(20, 48)))}"'
+             for n in range(count)]
+    started = time.perf_counter()
+    found = find_secret_literals(lines)
+    rate = count / (time.perf_counter() - started)
+    print(f"🔑 Secret detector: {rate:,.0f} literals/s ({len(found)} flagged of {count})")
+    return rate
+
+
+def count_code_lines(code: str) -> int:
+    """Number of non-blank lines"""
+    return len([line for line in code.split('\n') if line.strip()])
+
+
 class CodeAntSimulator:
-    def __init__(self):
+    def __init__(self, baseline=None, rules=None):
         self.issues_found = []
         self.analysis_results = {}
-        
-    def analyze_code(self, code: str, filename: str = "demo.py") -> Dict[str, Any]:
+        # Known findings (a codeant_baseline.Baseline) dropped before they are reported
+        self.baseline = baseline
+        # Disabled rules and severity overrides (a codeant_config.RuleSet); None runs everything
+        self.rules = rules
+        # Root-relative path of the file being analyzed, part of every fingerprint
+        self.path = ""
+        self.suppressed = 0
+        self._code = ""
+        self._source = None
+        self._artifacts = {}
+        self._rule = None
+        self._suppressed_lines = set()
+        # Seconds spent in each pass during the last run
+        self.pass_seconds = {}
+        
+    # Analysis passes in execution order; each maps to a `_<name>_analysis` method
+    PASSES = ("security", "quality", "performance", "maintainability", "dead_code")
+    # Passes whose findings only depend on nearby lines, so a file can be split
+    # into line-range chunks for them and the results merged afterwards
+    LINE_LOCAL_PASSES = ("security", "quality")
+    # Rules of line-local passes that still need the whole file: dataflow
+    # across functions, and function lengths that end at the next `def`
+    WHOLE_FILE_RULES = ("sql_taint", "long_function")
+
+    SEVERITY_RANK = {"LOW": 1, "MEDIUM": 2, "HIGH": 3, "CRITICAL": 4}
+    # Artifacts that may come from a shared per-scan cache, by cache attribute
+    SHARED_ARTIFACTS = {"lines": "lines", "tokens": "tokens", "ast": "tree"}
+    # Individually runnable rules as (rule, owning pass, most severe finding
+    # it can report, rough relative cost); each maps to `_<rule>_analysis`.
+    # Listed in pass order, which is the order a full run reports in.
+    RULES = (
+        ("security_pattern", "security", "CRITICAL", 1),
+        ("secret_literal", "security", "CRITICAL", 2),
+        ("sql_taint", "security", "CRITICAL", 4),
+        ("long_function", "quality", "MEDIUM", 1),
+        ("complex_condition", "quality", "MEDIUM", 1),
+        ("type_hints", "quality", "LOW", 1),
+        ("performance", "performance", "HIGH", 2),
+        ("maintainability", "maintainability", "MEDIUM", 2),
+        ("dead_code", "dead_code", "LOW", 5),
+    )
+
+    def analyze_code(self, code: str, filename: str = "demo.py", verbose: bool = True) -> Dict[str, Any]:
         """
         Simulate CodeAnt AI's comprehensive code analysis
         """
-        print(f"\n🚀 CodeAnt AI Analysis Started for {filename}")
-        print("=" * 60)
+        if verbose:
+            print(f"\n🚀 CodeAnt AI Analysis Started for {filename}")
+            print("=" * 60)
+            
+            # Simulate analysis delay
+            self._animate_analysis()
+        
+        # Run different types of analysis
+        self.run_passes(code)
         
-        # Simulate analysis delay
-        self._animate_analysis()
+        # Generate summary
+        return self._generate_report(filename, code)
+    
+    def run_passes(self, code: str, passes=PASSES, line_offset: int = 0,
+                   source=None, exclude: Tuple[str, ...] = ()) -> List[Dict[str, Any]]:
+        """Run the selected analysis passes and return the issues they found.
+        
+        `line_offset` shifts reported line numbers so that a chunk of a larger
+        file reports lines relative to the whole file. `source` may hold the
+        shared artifacts of `code` (a codeant_artifacts.SourceArtifacts) so
+        lines, tokens and the parsed tree are reused instead of rebuilt.
+        Rules named in `exclude` are skipped even if their pass is selected.
+        """
+        self._begin(code, source)
+        for rule, owner, _, _ in self.RULES:
+            if owner in passes and rule not in exclude and self._enabled(rule):
+                self._rule = rule
+                started = time.perf_counter()
+                getattr(self, f"_{rule}_analysis")(code)
+                self.pass_seconds[owner] = self.pass_seconds.get(owner, 0.0) + time.perf_counter() - started
+        
+        if line_offset:
+            for issue in self.issues_found:
+                issue["line"] += line_offset
+        return self.issues_found
+    
+    def gate_check(self, code: str, threshold: str = "CRITICAL", passes=PASSES) -> Optional[Dict[str, Any]]:
+        """Return the first issue at or above `threshold`, or None.
         
-        # Reset results
+        Rules run most-severe and cheapest first, rules that cannot reach the
+        threshold are never run, and checking stops at the first qualifying
+        finding. Meant for blocking hooks that only need a yes/no answer.
+        """
+        minimum = self.SEVERITY_RANK[threshold]
+        rules = sorted(((name, self._max_severity(name, severity), cost)
+                        for name, owner, severity, cost in self.RULES
+                        if owner in passes and self._enabled(name)),
+                       key=lambda rule: (-self.SEVERITY_RANK[rule[1]], rule[2]))
+        # Earlier rules' findings stay recorded so later rules can skip lines
+        # they already cover, exactly as in a full run
+        self._begin(code)
+        for name, severity, _ in rules:
+            if self.SEVERITY_RANK[severity] < minimum:
+                break
+            checked = len(self.issues_found)
+            self._rule = name
+            getattr(self, f"_{name}_analysis")(code)
+            for issue in self.issues_found[checked:]:
+                if self.SEVERITY_RANK[issue["severity"]] >= minimum:
+                    return issue
+        return None
+    
+    def _enabled(self, rule: str) -> bool:
+        return self.rules is None or self.rules.enabled(rule)
+    
+    def _max_severity(self, rule: str, severity: str) -> str:
+        """Most severe finding a rule can report once overrides are applied"""
+        if self.rules is None:
+            return severity
+        return self.rules.severity.get(rule, severity)
+    
+    def _begin(self, code: str, source=None):
+        """Reset per-run state before analyzing `code`"""
         self.issues_found = []
+        self._code = code
+        self._source = source
+        self._artifacts = {}
+        self._rule = None
+        self._suppressed_lines = set()
+        self.pass_seconds = {}
+    
+    def _artifact(self, name: str):
+        """Preprocessed form of the current code, built on first use.
         
-        # Run different types of analysis
-        self._security_analysis(code)
-        self._quality_analysis(code)
-        self._performance_analysis(code)
-        self._maintainability_analysis(code)
-        self._dead_code_analysis(code)
+        Rules ask for what they need (lines, tokens, ast, symbols, scopes),
+        so artifacts only used by disabled rules are never computed.
+        """
+        if name not in self._artifacts:
+            if self._source is not None and name in self.SHARED_ARTIFACTS:
+                self._artifacts[name] = getattr(self._source, self.SHARED_ARTIFACTS[name])
+            else:
+                self._artifacts[name] = getattr(self, f"_build_{name}")()
+        return self._artifacts[name]
+    
+    def _build_lines(self) -> List[str]:
+        return self._code.split('\n')
+    
+    def _build_tokens(self) -> List[str]:
+        """Identifier-like word tokens"""
+        return re.findall(r'\w+', self._code)
+    
+    def _build_ast(self) -> Optional[ast.AST]:
+        """Parsed Python module, or None for code that does not parse"""
+        try:
+            return ast.parse(self._code)
+        except (SyntaxError, ValueError):
+            return None
+    
+    def _build_symbols(self) -> Dict[str, Any]:
+        """Defined function names and how often every name occurs"""
+        return {"functions": re.findall(r'def\s+(\w+)', self._code),
+                "occurrences": Counter(self._artifact("tokens"))}
+    
+    def _build_scopes(self) -> List[str]:
+        return enclosing_scopes(self._artifact("lines"))
+    
+    def _emit(self, category: str, severity: str, line: int, issue: str,
+              description: str, suggestion: str, code_snippet: str):
+        """Record a finding unless the baseline already knows it.
         
-        # Generate summary
-        return self._generate_report(filename)
+        Known findings are dropped here, before an issue dict is ever built.
+        """
+        scopes = self._artifact("scopes")
+        scope = scopes[line] if 0 < line < len(scopes) else ""
+        fingerprint = issue_fingerprint(issue, code_snippet, scope, self.path)
+        if self.baseline is not None and fingerprint in self.baseline:
+            self.suppressed += 1
+            self._suppressed_lines.add((line, issue))
+            return
+        severity = self._max_severity(self._rule, severity)
+        self.issues_found.append({
+            "category": category,
+            "severity": severity,
+            "line": line,
+            "issue": issue,
+            "description": description,
+            "suggestion": suggestion,
+            "code_snippet": code_snippet,
+            "fingerprint": f"{fingerprint:016x}"
+        })
+    
+    def _reported_lines(self, *issue_names: str) -> set:
+        """Lines already holding one of these issues, including suppressed ones"""
+        lines = {issue["line"] for issue in self.issues_found if issue["issue"] in issue_names}
+        lines.update(line for line, name in self._suppressed_lines if name in issue_names)
+        return lines
     
     def _animate_analysis(self):
         """Simulate real-time analysis animation"""
@@ -57,8 +454,14 @@ class CodeAntSimulator:
     
     def _security_analysis(self, code: str):
         """Detect security vulnerabilities"""
+        self._security_pattern_analysis(code)
+        self._secret_literal_analysis(code)
+        self._sql_taint_analysis(code)
+    
+    def _security_pattern_analysis(self, code: str):
+        """Line-by-line regex checks for well-known vulnerable patterns"""
         security_patterns = {
-            r"SELECT.*FROM.*WHERE.*=.*\+": {
+            SQL_CONCAT_PATTERN: {
                 "type": "CRITICAL",
                 "issue": "SQL Injection Vulnerability",
                 "description": "Direct string concatenation in SQL query",
@@ -85,25 +488,62 @@ class CodeAntSimulator:
             }
         }
         
-        lines = code.split('\n')
-        for i, line in enumerate(lines, 1):
+        for i, line in enumerate(self._artifact("lines"), 1):
             for pattern, details in security_patterns.items():
                 if re.search(pattern, line, re.IGNORECASE):
-                    self.issues_found.append({
-                        "category": "Security",
-                        "severity": details["type"],
-                        "line": i,
-                        "issue": details["issue"],
-                        "description": details["description"],
-                        "suggestion": details["fix"],
-                        "code_snippet": line.strip()
-                    })
+                    self._emit(
+                        category="Security",
+                        severity=details["type"],
+                        line=i,
+                        issue=details["issue"],
+                        description=details["description"],
+                        suggestion=details["fix"],
+                        code_snippet=line.strip()
+                    )
+    
+    def _secret_literal_analysis(self, code: str):
+        """Secrets assigned to arbitrary names, found by shape rather than name"""
+        lines = self._artifact("lines")
+        flagged = self._reported_lines("Hardcoded Password", "Hardcoded API Key")
+        for i, literal, severity, reason in find_secret_literals(lines):
+            if i in flagged:
+                continue
+            self._emit(
+                category="Security",
+                severity=severity,
+                line=i,
+                issue="Hardcoded Secret",
+                description=f"String literal looks like a credential: {reason}",
+                suggestion="Move the secret to environment variables or a secure vault and rotate it",
+                code_snippet=lines[i - 1].strip()
+            )
+    
+    def _sql_taint_analysis(self, code: str):
+        """Dataflow-based SQL injection: catches f-string queries and queries
+        built in one function and executed in another"""
+        tree = self._artifact("ast")
+        if tree is None:
+            return
+        # Lines the pattern rule reports (or would, were it not baselined) are
+        # taken from the code itself, so this holds when the two rules run
+        # in separate tasks of a chunked file
+        lines = self._artifact("lines")
+        pattern_on = self._enabled("security_pattern")
+        for issue in find_sql_injections(code, tree=tree):
+            line = lines[issue["line"] - 1] if 0 < issue["line"] <= len(lines) else ""
+            if not (pattern_on and re.search(SQL_CONCAT_PATTERN, line, re.IGNORECASE)):
+                self._emit(issue["category"], issue["severity"], issue["line"], issue["issue"],
+                           issue["description"], issue["suggestion"], issue["code_snippet"])
     
     def _quality_analysis(self, code: str):
         """Analyze code quality issues"""
-        lines = code.split('\n')
-        
-        # Check for long functions
+        self._long_function_analysis(code)
+        self._complex_condition_analysis(code)
+        self._type_hints_analysis(code)
+    
+    def _long_function_analysis(self, code: str):
+        """Functions with more lines than fit on a screen"""
+        lines = self._artifact("lines")
         current_function = None
         function_lines = 0
         in_function = False
@@ -114,83 +554,85 @@ class CodeAntSimulator:
             # Detect function definitions
             if stripped.startswith('def '):
                 if in_function and function_lines > 20:
-                    self.issues_found.append({
-                        "category": "Code Quality",
-                        "severity": "MEDIUM",
-                        "line": i - function_lines,
-                        "issue": "Function Too Long",
-                        "description": f"Function has {function_lines} lines (recommended: <20)",
-                        "suggestion": "Consider breaking into smaller functions",
-                        "code_snippet": current_function
-                    })
+                    self._emit(
+                        category="Code Quality",
+                        severity="MEDIUM",
+                        line=i - function_lines,
+                        issue="Function Too Long",
+                        description=f"Function has {function_lines} lines (recommended: <20)",
+                        suggestion="Consider breaking into smaller functions",
+                        code_snippet=current_function
+                    )
                 
                 current_function = stripped
                 function_lines = 0
                 in_function = True
             elif in_function:
                 function_lines += 1
-        
-        # Check for complex conditions
-        for i, line in enumerate(lines, 1):
+    
+    def _complex_condition_analysis(self, code: str):
+        """Conditions chaining too many boolean operators"""
+        for i, line in enumerate(self._artifact("lines"), 1):
             if_count = line.count('if') + line.count('elif')
             and_or_count = line.count(' and ') + line.count(' or ')
             
             if if_count > 0 and and_or_count > 2:
-                self.issues_found.append({
-                    "category": "Code Quality",
-                    "severity": "MEDIUM",
-                    "line": i,
-                    "issue": "Complex Condition",
-                    "description": "Condition too complex, hard to understand",
-                    "suggestion": "Break into multiple conditions or use helper functions",
-                    "code_snippet": line.strip()
-                })
-        
-        # Check for missing type hints
-        for i, line in enumerate(lines, 1):
+                self._emit(
+                    category="Code Quality",
+                    severity="MEDIUM",
+                    line=i,
+                    issue="Complex Condition",
+                    description="Condition too complex, hard to understand",
+                    suggestion="Break into multiple conditions or use helper functions",
+                    code_snippet=line.strip()
+                )
+    
+    def _type_hints_analysis(self, code: str):
+        """Functions without a return type annotation"""
+        for i, line in enumerate(self._artifact("lines"), 1):
             if line.strip().startswith('def ') and '->' not in line and '__init__' not in line:
-                self.issues_found.append({
-                    "category": "Code Quality",
-                    "severity": "LOW",
-                    "line": i,
-                    "issue": "Missing Type Hints",
-                    "description": "Function lacks return type annotation",
-                    "suggestion": "Add type hints for better code documentation",
-                    "code_snippet": line.strip()
-                })
+                self._emit(
+                    category="Code Quality",
+                    severity="LOW",
+                    line=i,
+                    issue="Missing Type Hints",
+                    description="Function lacks return type annotation",
+                    suggestion="Add type hints for better code documentation",
+                    code_snippet=line.strip()
+                )
     
     def _performance_analysis(self, code: str):
         """Detect performance issues"""
-        lines = code.split('\n')
+        lines = self._artifact("lines")
         
         for i, line in enumerate(lines, 1):
             # Detect nested loops
             if 'for' in line and any('for' in lines[j] for j in range(max(0, i-5), min(len(lines), i+5)) if j != i-1):
-                self.issues_found.append({
-                    "category": "Performance",
-                    "severity": "HIGH",
-                    "line": i,
-                    "issue": "Nested Loop Detected",
-                    "description": "Potential O(n²) time complexity",
-                    "suggestion": "Consider using hash maps or more efficient algorithms",
-                    "code_snippet": line.strip()
-                })
+                self._emit(
+                    category="Performance",
+                    severity="HIGH",
+                    line=i,
+                    issue="Nested Loop Detected",
+                    description="Potential O(n²) time complexity",
+                    suggestion="Consider using hash maps or more efficient algorithms",
+                    code_snippet=line.strip()
+                )
             
             # Detect string concatenation in loops
             if 'for' in line and ('+=' in line or '+' in line) and 'str' in line.lower():
-                self.issues_found.append({
-                    "category": "Performance", 
-                    "severity": "MEDIUM",
-                    "line": i,
-                    "issue": "Inefficient String Concatenation",
-                    "description": "String concatenation in loop is inefficient",
-                    "suggestion": "Use list.join() or f-strings instead",
-                    "code_snippet": line.strip()
-                })
+                self._emit(
+                    category="Performance", 
+                    severity="MEDIUM",
+                    line=i,
+                    issue="Inefficient String Concatenation",
+                    description="String concatenation in loop is inefficient",
+                    suggestion="Use list.join() or f-strings instead",
+                    code_snippet=line.strip()
+                )
     
     def _maintainability_analysis(self, code: str):
         """Check maintainability factors"""
-        lines = code.split('\n')
+        lines = self._artifact("lines")
         
         # Check for code duplication
         line_counts = {}
@@ -204,42 +646,41 @@ class CodeAntSimulator:
         
         for line_text, occurrences in line_counts.items():
             if len(occurrences) > 1:
-                self.issues_found.append({
-                    "category": "Maintainability",
-                    "severity": "MEDIUM",
-                    "line": occurrences[0],
-                    "issue": "Code Duplication",
-                    "description": f"Identical code found on lines: {', '.join(map(str, occurrences))}",
-                    "suggestion": "Extract common code into a function",
-                    "code_snippet": line_text
-                })
+                self._emit(
+                    category="Maintainability",
+                    severity="MEDIUM",
+                    line=occurrences[0],
+                    issue="Code Duplication",
+                    description=f"Identical code found on lines: {', '.join(map(str, occurrences))}",
+                    suggestion="Extract common code into a function",
+                    code_snippet=line_text
+                )
     
     def _dead_code_analysis(self, code: str):
         """Detect unused code"""
         # Simple heuristic for unused functions
-        function_names = re.findall(r'def\s+(\w+)', code)
+        symbols = self._artifact("symbols")
         
-        for func_name in function_names:
+        for func_name in symbols["functions"]:
             # Count occurrences (definition + calls)
-            occurrences = len(re.findall(rf'\b{func_name}\b', code))
+            occurrences = symbols["occurrences"][func_name]
             
             # If only found once (just the definition), it's likely unused
             if occurrences == 1 and func_name not in ['__init__', '__str__', '__repr__']:
-                lines = code.split('\n')
-                for i, line in enumerate(lines, 1):
+                for i, line in enumerate(self._artifact("lines"), 1):
                     if f'def {func_name}' in line:
-                        self.issues_found.append({
-                            "category": "Dead Code",
-                            "severity": "LOW",
-                            "line": i,
-                            "issue": "Unused Function",
-                            "description": f"Function '{func_name}' is defined but never called",
-                            "suggestion": "Remove unused function or add usage",
-                            "code_snippet": line.strip()
-                        })
+                        self._emit(
+                            category="Dead Code",
+                            severity="LOW",
+                            line=i,
+                            issue="Unused Function",
+                            description=f"Function '{func_name}' is defined but never called",
+                            suggestion="Remove unused function or add usage",
+                            code_snippet=line.strip()
+                        )
                         break
     
-    def _generate_report(self, filename: str) -> Dict[str, Any]:
+    def _generate_report(self, filename: str, code: str = "", code_lines: Optional[int] = None) -> Dict[str, Any]:
         """Generate comprehensive analysis report"""
         # Count issues by severity
         severity_counts = {"CRITICAL": 0, "HIGH": 0, "MEDIUM": 0, "LOW": 0}
@@ -252,7 +693,8 @@ class CodeAntSimulator:
         
         # Calculate metrics
         total_issues = len(self.issues_found)
-        code_lines = len([line for line in filename.split('\n') if line.strip()])
+        if code_lines is None:
+            code_lines = count_code_lines(code)
         
         report = {
             "filename": filename,
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+CodeAnt AI File Watching
+Reports changed source files under a directory, using inotify on Linux and
+falling back to polling file modification times everywhere else
+"""
+
+import os
+import sys
+import time
+import ctypes
+import ctypes.util
+import select
+import struct
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+              IN_CREATE | IN_DELETE | IN_DELETE_SELF)
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class PollingWatcher:
+    """Detects changes by comparing (mtime, size) snapshots of the tree"""
+
+    def __init__(self, root: str, extensions: Tuple[str, ...], skip_dirs: Iterable[str],
+                 interval: float = 0.5):
+        self.root = root
+        self.extensions = tuple(extensions)
+        self.skip_dirs = set(skip_dirs)
+        self.interval = interval
+        self.snapshot = self._snapshot()
+
+    def _snapshot(self) -> Dict[str, Tuple[int, int]]:
+        state = {}
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [d for d in dirnames if d not in self.skip_dirs]
+            for name in filenames:
+                if name.endswith(self.extensions):
+                    path = os.path.join(dirpath, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    state[path] = (stat.st_mtime_ns, stat.st_size)
+        return state
+
+    def poll(self, timeout: float) -> Set[str]:
+        """Changed, created or deleted paths since the last call"""
+        time.sleep(min(timeout, self.interval))
+        current = self._snapshot()
+        changed = {path for path in current.keys() | self.snapshot.keys()
+                   if current.get(path) != self.snapshot.get(path)}
+        self.snapshot = current
+        return changed
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """Linux inotify watcher over every directory of the tree.
+
+    Talks to libc through ctypes so no third-party package is needed.
+    Directories created later are watched as they appear.
+    """
+
+    def __init__(self, root: str, extensions: Tuple[str, ...], skip_dirs: Iterable[str]):
+        self.extensions = tuple(extensions)
+        self.skip_dirs = set(skip_dirs)
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches: Dict[int, str] = {}
+        self._watch_tree(root)
+
+    def _watch_tree(self, root: str):
+        for dirpath, dirnames, _ in os.walk(root):
+            dirnames[:] = [d for d in dirnames if d not in self.skip_dirs]
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(dirpath), WATCH_MASK)
+            if wd < 0:
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {dirpath}")
+            self.watches[wd] = dirpath
+
+    def poll(self, timeout: float) -> Set[str]:
+        """Changed, created or deleted paths seen within `timeout` seconds"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        changed = set()
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            raw_name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length]
+            offset += EVENT_HEADER.size + length
+            if mask & IN_Q_OVERFLOW:
+                raise OverflowError("inotify event queue overflowed")
+            directory = self.watches.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:
+                del self.watches[wd]
+                continue
+            name = os.fsdecode(raw_name.rstrip(b"\0"))
+            path = os.path.join(directory, name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and name not in self.skip_dirs:
+                    self._watch_tree(path)
+                    # Files may land in the new directory before its watch exists
+                    for dirpath, dirnames, filenames in os.walk(path):
+                        dirnames[:] = [d for d in dirnames if d not in self.skip_dirs]
+                        changed.update(os.path.join(dirpath, f) for f in filenames
+                                       if f.endswith(self.extensions))
+            elif name.endswith(self.extensions):
+                changed.add(path)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+def create_watcher(root: str, extensions: Tuple[str, ...], skip_dirs: Iterable[str],
+                   polling: bool = False):
+    """inotify where available, polling otherwise"""
+    if not polling and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(root, extensions, skip_dirs)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(root, extensions, skip_dirs)
+
+
+def next_batch(watcher, debounce: float = 0.3, max_wait: float = 2.0,
+               timeout: Optional[float] = None) -> Set[str]:
+    """Block until files change, then coalesce further changes into one batch.
+
+    The batch closes once no new change arrived for `debounce` seconds, or
+    `max_wait` seconds after the first change so a steady stream of writes
+    cannot postpone analysis forever. Returns an empty set if nothing changed
+    within `timeout` seconds.
+    """
+    started = time.monotonic()
+    batch: Set[str] = set()
+    while not batch:
+        remaining = None if timeout is None else timeout - (time.monotonic() - started)
+        if remaining is not None and remaining <= 0:
+            return batch
+        batch = watcher.poll(1.0 if remaining is None else min(remaining, 1.0))
+
+    first_change = time.monotonic()
+    while time.monotonic() - first_change < max_wait:
+        more = watcher.poll(debounce)
+        if not more:
+            break
+        batch |= more
+    return batch
@@ -0,0 +1,46 @@
+import pytest
+
+from codeant_config import Config
+
+
+def _config(*paths):
+    return Config({"overrides": [{"paths": list(paths), "rules": {"security": False}}]}, root="/repo")
+
+
+def _security_on(config, directory):
+    return config.for_directory(f"/repo/{directory}" if directory else "/repo").enabled("sql_taint")
+
+
+@pytest.mark.parametrize("pattern", ["tests", "tests/", "tests/*", "tests/**", "**/tests", "**/tests/**"])
+def test_directory_globs_cover_the_directory_and_below(pattern):
+    config = _config(pattern)
+    assert not _security_on(config, "tests")
+    assert not _security_on(config, "tests/unit/fixtures")
+    assert _security_on(config, "")
+    assert _security_on(config, "src")
+    assert _security_on(config, "src/tests_helpers")
+
+
+def test_nested_and_wildcard_directories():
+    config = _config("**/migrations", "services/*/generated/**")
+    assert not _security_on(config, "app/db/migrations")
+    assert not _security_on(config, "services/billing/generated")
+    assert _security_on(config, "services/billing")
+
+
+def test_later_overrides_win():
+    config = Config({"overrides": [{"paths": ["src/**"], "rules": {"security": False}},
+                                   {"paths": ["src/api"], "rules": {"sql_taint": True}}]}, root="/repo")
+    assert _security_on(config, "src/api/v1")
+    assert not _security_on(config, "src/core")
+
+
+@pytest.mark.parametrize("pattern", ["**/*_test.py", "tests/conftest.py", "static/*.js", "*.min.*"])
+def test_globs_naming_files_are_rejected(pattern):
+    with pytest.raises(ValueError, match="names files"):
+        _config(pattern)
+
+
+def test_directory_names_with_dots_are_accepted():
+    config = _config("docs/v1.2", ".github")
+    assert not _security_on(config, "docs/v1.2")
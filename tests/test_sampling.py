@@ -0,0 +1,40 @@
+import math
+
+import pytest
+
+from codeant import SampledScan, t_quantile
+
+
+@pytest.mark.parametrize("df, expected", [(1, 12.706), (2, 4.303), (30, 2.042), (40, 2.021), (120, 1.980)])
+def test_t_quantile(df, expected):
+    assert t_quantile(df) == pytest.approx(expected, abs=1e-3)
+
+
+def test_t_quantile_limits():
+    assert t_quantile(0) == math.inf
+    assert t_quantile(math.inf) == pytest.approx(1.96, abs=1e-3)
+
+
+def _sample(scores_by_stratum, fraction):
+    files = [f"/repo/{stratum}/f{i}.py" for stratum, scores in scores_by_stratum.items() for i in range(len(scores))]
+    score = {f"/repo/{stratum}/f{i}.py": value
+             for stratum, scores in scores_by_stratum.items() for i, value in enumerate(scores)}
+    sampler = SampledScan("/repo", files, seed=1)
+    for path in sampler.next_files(fraction):
+        sampler.add(path, {"metrics": {"code_lines": 100, "security_score": score[path], "quality_score": 50},
+                           "severity_breakdown": {}, "category_breakdown": {}, "total_issues": 1})
+    return sampler.estimates()["security_score"]
+
+
+def test_interval_from_two_files_per_stratum_uses_t_quantile():
+    scores = {"a": [40, 60, 55, 45] * 5, "b": [80, 90, 85, 95] * 5}
+    estimate = _sample(scores, 0.1)
+    low, high = estimate["ci95"]
+    # Two files per stratum: 2 degrees of freedom, far wider than z = 1.96 would give
+    margin = (high - low) / 2
+    assert margin > 2 * 1.96 * margin / t_quantile(2)
+    assert low <= sum(sum(s) for s in scores.values()) / 40 <= high
+
+
+def test_single_file_per_stratum_is_unbounded():
+    assert _sample({"a": [10, 20, 30], "b": [40, 50, 60]}, 0.1)["ci95"] == [0.0, 100.0]
@@ -0,0 +1,56 @@
+import os
+
+import pytest
+
+from codeant import CostModel, ScanScheduler, merge_results, plan_tasks, _run_batch
+from codeant_artifacts import ArtifactCache
+from codeant_simulator import CodeAntSimulator
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _key(issue):
+    return issue["line"], issue["issue"], issue["severity"], issue["code_snippet"]
+
+
+@pytest.mark.parametrize("name", ["codeant.py", "codeant_simulator.py", "sample.py"])
+def test_chunked_scan_matches_whole_file(name):
+    path = os.path.join(ROOT, name)
+    with open(path, encoding="utf-8") as f:
+        code = f.read()
+    whole = CodeAntSimulator().run_passes(code)
+
+    tasks = plan_tasks([path], CostModel(), chunk_lines=40)
+    assert sum(1 for task in tasks if task["range"] is not None) > 1
+    chunked = merge_results(_run_batch(tasks, ArtifactCache()))[path]
+
+    assert sorted(map(_key, chunked)) == sorted(map(_key, whole))
+
+
+def test_long_function_before_chunk_boundary_is_reported(tmp_path):
+    body = "".join(f"    x{i} = {i}\n" for i in range(30))
+    path = tmp_path / "long.py"
+    path.write_text(("def first():\n" + body + "\n") * 4)
+
+    tasks = plan_tasks([str(path)], CostModel(), chunk_lines=20)
+    issues = merge_results(_run_batch(tasks, ArtifactCache()))[str(path)]
+
+    # Every function but the last is followed by another `def`
+    assert sum(1 for issue in issues if issue["issue"] == "Function Too Long") == 3
+
+
+def test_files_are_handed_over_once_all_their_chunks_finish(tmp_path):
+    paths = []
+    for i, functions in enumerate((2, 60, 40)):
+        path = tmp_path / f"m{i}.py"
+        path.write_text("".join(f"def value_{n}():\n    return {n}\n\n" for n in range(functions)))
+        paths.append(str(path))
+
+    handed = []
+    scheduler = ScanScheduler(1, str(tmp_path / "timings.json"), chunk_lines=40)
+    results, stats = scheduler.run(paths, on_file=lambda path, found: handed.append((path, found)))
+
+    assert results == []
+    assert sorted(path for path, _ in handed) == sorted(paths)
+    assert stats["tasks"] == sum(len(found) for _, found in handed) > len(paths)
+    assert all(sum(1 for r in found if "code_lines" in r) == 1 for _, found in handed)
@@ -0,0 +1,63 @@
+import os
+
+from codeant import MAX_DUPLICATE_FILES, find_cross_file_duplicates, merge_partials, scan, scan_shard
+
+SHARED = '''def normalize_record(record):
+    cleaned = {key.strip().lower(): value for key, value in record.items()}
+    cleaned["name"] = cleaned.get("name", "").title()
+    cleaned["email"] = cleaned.get("email", "").lower()
+    return cleaned
+'''
+
+HEADER = '''# Copyright (c) Example Corporation. All rights reserved.
+# Licensed under the Example License, Version 2.0; see LICENSE for terms.
+import logging
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+'''
+
+
+def _write_repository(root):
+    for i in range(MAX_DUPLICATE_FILES + 4):
+        body = SHARED if i < 3 else f"def helper_{i}(value):\n    return value * {i}\n"
+        (root / f"module_{i:02d}.py").write_text(HEADER + "\n" + body)
+    (root / "views.py").write_text(
+        "import sys\n\ndef show(cursor):\n"
+        "    cursor.execute(\"SELECT * FROM users WHERE name = '\" + sys.argv[1] + \"'\")\n")
+
+
+def _issues(report):
+    return {os.path.basename(file_report["filename"]):
+            sorted((issue["line"], issue["issue"], issue["severity"], issue["description"], issue["fingerprint"])
+                   for issue in file_report["issues"])
+            for file_report in report["files"]}
+
+
+def test_three_shards_merge_to_the_plain_scan(tmp_path):
+    _write_repository(tmp_path)
+    root = str(tmp_path)
+    plain = scan(root, workers=1)
+    partials = [scan_shard(root, index, 3, workers=1) for index in range(3)]
+    assert all(partial["files"] for partial in partials)
+    merged = merge_partials(partials, root)
+
+    assert _issues(merged) == _issues(plain)
+    for key in ("files_analyzed", "total_issues", "severity_breakdown", "category_breakdown", "metrics"):
+        assert merged[key] == plain[key]
+    duplicated = {name for name, issues in _issues(plain).items()
+                  if any(issue[1] == "Cross-file Duplication" for issue in issues)}
+    # The header is in every file, so only the three copies of SHARED count
+    assert duplicated == {"module_00.py", "module_01.py", "module_02.py"}
+
+
+def test_duplicates_are_reported_once_per_file():
+    blocks = {f"m{i}.py": [["abc", 10 + i], ["def", 30]] for i in range(MAX_DUPLICATE_FILES)}
+    issues = find_cross_file_duplicates(blocks)
+    assert sorted(issues) == sorted(blocks)
+    assert all(len(found) == 1 for found in issues.values())
+    assert issues["m0.py"][0]["line"] == 10
+    assert issues["m0.py"][0]["description"] == (
+        f"Code block also appears in m1.py (line 11); shares code with {MAX_DUPLICATE_FILES - 1} other files")
+
+    blocks["m_extra.py"] = [["abc", 5]]
+    assert "m_extra.py" not in find_cross_file_duplicates(blocks)
@@ -0,0 +1,158 @@
+import textwrap
+
+from codeant import merge_results, run_taint_analysis
+from codeant_simulator import CodeAntSimulator
+from codeant_taint import TaintEngine, find_sql_injections
+
+
+def _findings(code):
+    return [(issue["line"], issue["severity"]) for issue in find_sql_injections(textwrap.dedent(code))]
+
+
+def test_parameter_formatted_into_query():
+    assert _findings("""
+        def lookup(cursor, name):
+            cursor.execute(f"SELECT * FROM users WHERE name = '{name}'")
+    """) == [(3, "CRITICAL")]
+
+
+def test_query_built_in_one_function_and_executed_in_another():
+    assert _findings("""
+        def build(name):
+            return "SELECT * FROM users WHERE name = '" + name + "'"
+
+        def run(cursor, query):
+            cursor.execute(query)
+
+        def handler(cursor, name):
+            run(cursor, build(name))
+    """) == [(9, "CRITICAL")]
+
+
+def test_untrusted_source_passed_unformatted():
+    assert _findings("""
+        import sys
+
+        def run(cursor, query):
+            cursor.execute(query)
+
+        def main(cursor):
+            run(cursor, sys.argv[1])
+            cursor.execute(input())
+    """) == [(8, "CRITICAL"), (9, "CRITICAL")]
+
+
+def test_request_attributes_are_untrusted():
+    assert _findings("""
+        def view(request, cursor):
+            cursor.execute(request.GET["query"])
+    """) == [(3, "CRITICAL")]
+
+
+def test_constant_interpolation_is_not_critical():
+    assert _findings("""
+        TABLE = "users"
+
+        def create(cursor):
+            cursor.execute(f"CREATE TABLE {TABLE} (id INTEGER)")
+    """) == [(5, "MEDIUM")]
+
+
+def test_parameterized_query_is_clean():
+    assert _findings("""
+        def lookup(cursor, name):
+            cursor.execute("SELECT * FROM users WHERE name = ?", (name,))
+    """) == []
+
+
+def test_cross_module_flow():
+    engine = TaintEngine()
+    engine.add_module("app.db", textwrap.dedent("""
+        def run(cursor, query):
+            cursor.execute(query)
+    """), "app/db.py")
+    engine.add_module("app.views", textwrap.dedent("""
+        from app.db import run
+
+        def search(cursor, term):
+            run(cursor, "SELECT * FROM items WHERE name LIKE '%" + term + "%'")
+    """), "app/views.py")
+    issues = engine.analyze()
+    assert list(issues) == ["app/views.py"]
+    assert [issue["line"] for issue in issues["app/views.py"]] == [5]
+
+
+DB = '''import sqlite3
+
+def lookup(cursor, name):
+    cursor.execute(f"SELECT * FROM users WHERE name = '{name}'")
+'''
+
+TOP = '''import sqlite3
+import sys
+cursor = sqlite3.connect("app.db").cursor()
+cursor.execute("SELECT * FROM users WHERE id = " + sys.argv[1])
+'''
+
+
+def _scan(tmp_path, sources):
+    engine = TaintEngine(str(tmp_path / "taint.json"))
+    for module, code in sources.items():
+        engine.add_module(module, code, f"{module}.py")
+    issues = engine.analyze()
+    engine.save()
+    found = {path: [(issue["line"], issue["code_snippet"]) for issue in found]
+             for path, found in issues.items()}
+    return found, engine.stats
+
+
+def test_cached_findings_follow_moved_code(tmp_path):
+    first, _ = _scan(tmp_path, {"db": DB, "top": TOP})
+    assert first == {
+        "db.py": [(4, """cursor.execute(f"SELECT * FROM users WHERE name = '{name}'")""")],
+        "top.py": [(4, """cursor.execute("SELECT * FROM users WHERE id = " + sys.argv[1])""")],
+    }
+
+    # A comment inside the function and blank lines above module code move
+    # every sink without changing any tree
+    moved_db = DB.replace("    cursor.execute", "    # look the user up\n    cursor.execute")
+    moved_top = "\n\n\n" + TOP
+    second, stats = _scan(tmp_path, {"db": moved_db, "top": moved_top})
+
+    assert stats["reused"] == stats["functions"] and stats["analyzed"] == 0
+    assert second == {
+        "db.py": [(5, first["db.py"][0][1])],
+        "top.py": [(7, first["top.py"][0][1])],
+    }
+
+
+def test_cache_reanalyzes_callers_of_changed_functions(tmp_path):
+    helper = "def run(cursor, query):\n    cursor.execute(query)\n"
+    caller = "from helper import run\n\ndef main(cursor):\n    run(cursor, input())\n"
+    first, _ = _scan(tmp_path, {"helper": helper, "caller": caller})
+    assert first == {"caller.py": [(4, "run(cursor, input())")]}
+
+    # The callee stops executing its parameter; the unchanged caller must follow
+    safe = "def run(cursor, query):\n    cursor.execute('SELECT 1')\n"
+    second, stats = _scan(tmp_path, {"helper": safe, "caller": caller})
+    assert second == {}
+    assert stats["analyzed"] >= 2
+
+
+def test_repository_taint_outranks_per_file_finding(tmp_path):
+    app = tmp_path / "app"
+    app.mkdir()
+    (app / "src.py").write_text("import sys\n\ndef user_name():\n    return sys.argv[1]\n")
+    views = app / "views.py"
+    views.write_text("from app.src import user_name\n\ndef show(cursor):\n"
+                     "    cursor.execute(f\"SELECT * FROM users WHERE name = '{user_name()}'\")\n")
+
+    # On its own views.py only formats an unknown call result into the query
+    per_file = CodeAntSimulator().run_passes(views.read_text())
+    assert [(issue["line"], issue["severity"]) for issue in per_file if issue["issue"] == "SQL Injection Vulnerability"] \
+        == [(4, "MEDIUM")]
+
+    repository, _ = run_taint_analysis(str(tmp_path), [str(app / "src.py"), str(views)])
+    merged = merge_results([{"path": str(views), "issues": per_file}], repository)[str(views)]
+    assert [(issue["line"], issue["severity"]) for issue in merged if issue["issue"] == "SQL Injection Vulnerability"] \
+        == [(4, "CRITICAL")]